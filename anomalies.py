@@ -0,0 +1,119 @@
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import data
+import timeseries
+import trends
+
+
+# Standardized anomaly of every county-month against that county's climatology for the calendar month
+# (mean and standard deviation over every year of record), stored in the same FIPS-partitioned layout as the
+# monthly series with one `<column>_z` per measure. Written by `python build_data.py anomalies`.
+ANOMALY_STORE = 'monthly-anomalies'
+# Every county's latest month, ranked by the size of its anomaly within each measure
+CURRENT_PATH = os.path.join(data.BUILD_DIR, f'anomalies_current.v{data.FORMAT_VERSION}.parquet')
+
+# Measures, as on the National Trends page
+METRICS = trends.METRICS
+# Months at least this many standard deviations from normal are marked on the county charts
+THRESHOLD = 2.0
+
+
+def compute_anomalies(store):
+    # One pass over the monthly arrays: climatology sums per (county, calendar month) cell with bincount,
+    # then every row standardized against its cell
+    fips, rows, lengths = store.gather()
+    dates = np.asarray(store.columns[store.date_column][rows])
+    cells = np.repeat(np.arange(len(fips)), lengths) * 12 + dates.astype('datetime64[M]').astype(np.int64) % 12
+
+    columns = {store.date_column: dates}
+    normals = {}
+    for column in METRICS:
+        values = np.asarray(store.columns[column][rows], dtype = float)
+        present = ~np.isnan(values)
+        filled = np.where(present, values, 0.0)
+        n = np.bincount(cells, weights = present, minlength = len(fips) * 12)
+        with np.errstate(invalid = 'ignore', divide = 'ignore'):
+            mean = np.bincount(cells, weights = filled, minlength = len(fips) * 12) / n
+            sq = np.bincount(cells, weights = filled ** 2, minlength = len(fips) * 12)
+            std = np.sqrt(np.maximum(sq - n * mean ** 2, 0) / (n - 1))
+            # A month that never varies (no drought in any year, say) has no anomalies
+            z = np.where(std[cells] > 1e-9, (values - mean[cells]) / std[cells], 0.0)
+        columns[f'{column}_z'] = np.where(present, z, np.nan).astype(np.float32)
+        normals[column] = (values, mean[cells])
+
+    stops = np.cumsum(lengths)
+    anomalies = timeseries.SeriesStore(store.date_column, columns, fips, (stops - lengths).tolist(), stops.tolist())
+
+    # Latest month of every county that reports the most recent month in the data
+    last = stops - 1
+    current = dates[last] == dates[last].max()
+    frames = []
+    for column in METRICS:
+        values, normal = normals[column]
+        frame = pd.DataFrame({
+            'fips': np.array(fips, dtype = object)[current],
+            'metric': column,
+            store.date_column: dates[last][current],
+            'value': values[last][current],
+            'normal': normal[last][current],
+            'z': columns[f'{column}_z'][last][current].astype(float),
+        })
+        frame['rank'] = frame['z'].abs().rank(ascending = False, method = 'min').astype('Int32')
+        frames.append(frame.sort_values('rank'))
+    return anomalies, pd.concat(frames, ignore_index = True)
+
+
+def build_anomalies():
+    anomalies, current = compute_anomalies(timeseries.load_store('monthly'))
+    anomalies.write(timeseries.store_path(ANOMALY_STORE))
+    data.write_parquet(current, CURRENT_PATH)
+    return anomalies, current
+
+
+@st.cache_resource(max_entries = 1, show_spinner = False)
+def _load_anomalies(path, version, monthly_version):
+    anomalies, current = timeseries.SeriesStore.open(path), pd.read_parquet(CURRENT_PATH)
+    anomalies.name = ANOMALY_STORE
+    anomalies.version = version
+    # The store is built row for row from the monthly one, so a county or month added since shows in the offsets
+    matches = anomalies.offsets == timeseries.load_store('monthly').offsets
+    return anomalies, current, matches
+
+
+def load_anomalies():
+    # (anomaly store, current anomalies table). Written only by `python build_data.py anomalies`; never
+    # computed during a rerun. Tables built from other monthly data raise data.StaleBuildError.
+    hint = "run `python build_data.py anomalies`"
+    path = timeseries.store_path(ANOMALY_STORE)
+    index_path = os.path.join(path, 'index.npz')
+    if not os.path.exists(index_path) or not os.path.exists(CURRENT_PATH):
+        raise FileNotFoundError(f"no anomalies in {data.BUILD_DIR}, {hint}")
+    anomalies, current, matches = _load_anomalies(path, data.file_version(index_path),
+                                                  timeseries.load_store('monthly').version)
+    if not matches:
+        raise data.StaleBuildError(f"the anomalies were built from other monthly data, {hint}")
+    return anomalies, current
+
+
+def current_anomalies(metric, state = None):
+    # Latest month's anomalies for one measure, largest first, with county names
+    county_index = data.load_county_index()
+    table = load_anomalies()[1]
+    table = table[(table['metric'] == metric) & table['fips'].isin(county_index.records)]
+    table = table.assign(county = table['fips'].map(lambda code: county_index.record(code)['countyname']),
+                         state = table['fips'].map(lambda code: county_index.record(code)['state']))
+    if state is not None:
+        table = table[table['state'] == state]
+    return table.sort_values('rank')
+
+
+def anomalous_months(anomalies, county_fips, column, min_year = None, max_year = None, threshold = THRESHOLD):
+    # Dates of the county's months at least `threshold` standard deviations from normal
+    if county_fips not in anomalies:
+        return pd.DatetimeIndex([])
+    z = anomalies.county(county_fips, min_year, [f'{column}_z'], max_year)[f'{column}_z']
+    return z.index[z.abs() >= threshold]
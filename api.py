@@ -0,0 +1,231 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import tornado.httpserver
+import tornado.ioloop
+import tornado.netutil
+import tornado.process
+import tornado.web
+
+import clusters
+import data
+import timeseries
+from results import ResultCache
+
+
+# Read-only JSON API over the same cached data layer as the app, served with tornado (which streamlit
+# already depends on). Run from the same directory as `streamlit run app.py`:
+#   python api.py --port 8600
+#
+#   GET /api/counties                                      every county: fips, state, countyname
+#   GET /api/counties/<fips>                               summary stats shown on the Cluster Charts page
+#   GET /api/counties/<fips>/clusters                      KMeans and DBSCAN label for every cluster model
+#   GET /api/counties/<fips>/series/<monthly|yearly>       ?start=<year>&end=<year>&columns=<a,b,...>
+
+DEFAULT_PORT = 8600
+# Fields of the county summary, as in the Cluster Charts bullets
+SUMMARY_FIELDS = ['population', 'ps_wtotl', 'do_psdel', 'ir_wfrto', 'ir_recww', 'to_wtotl', 'median_household_income']
+# Encoded responses kept in memory, keyed by request and data version, up to this many bytes (least recently
+# used first out)
+RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# Smaller bodies are not worth compressing
+MIN_GZIP_BYTES = 512
+# Data files are checked for changes at most this often
+VERSION_CHECK_SECONDS = 1.0
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def json_values(values):
+    # Plain Python values for json, with NaN as null
+    return [None if v != v else v for v in np.asarray(values).tolist()]
+
+
+def county_list():
+    county_index = data.load_county_index()
+    return [{'fips': fips, 'state': record['state'], 'countyname': record['countyname']}
+            for fips, record in sorted(county_index.records.items())]
+
+
+def county_summary(county_fips):
+    record = data.load_county_index().record(county_fips)
+    summary = {'fips': county_fips, 'state': record['state'], 'countyname': record['countyname']}
+    for field in SUMMARY_FIELDS:
+        value = record[field]
+        value = value.item() if hasattr(value, 'item') else value
+        summary[field] = None if value != value else value
+    return summary
+
+
+def county_clusters(county_fips):
+    data.load_county_index().record(county_fips)
+    labels = {}
+    for model_id in clusters.MODELS:
+        labels[model_id] = {method: clusters.county_cluster(model_id, county_fips, method)
+                            for method in clusters.METHODS.values()}
+    return {'fips': county_fips, 'clusters': labels}
+
+
+def county_series(name, county_fips, start, end, columns):
+    store = timeseries.load_store(name)
+    if county_fips not in store:
+        raise KeyError(county_fips)
+    if store.date_column in (columns or ()):
+        raise BadRequest(f"{store.date_column} is returned as the dates, not as a column")
+    unknown = set(columns or ()) - set(store.columns)
+    if unknown:
+        raise BadRequest(f"unknown column(s): {', '.join(sorted(unknown))}")
+    df = store.county(county_fips, start, list(columns) if columns else None, end)
+    return {
+        'fips': county_fips,
+        'series': name,
+        'dates': df.index.strftime('%Y-%m-%d').tolist(),
+        'columns': {column: json_values(df[column]) for column in df.columns},
+    }
+
+
+ROUTES = {
+    'counties': county_list,
+    'county': county_summary,
+    'clusters': county_clusters,
+    'series': county_series,
+}
+
+
+_versions = {'checked': 0.0, 'versions': None}
+
+
+def data_versions():
+    # File versions every response depends on; a changed file changes the cache keys and the ETags
+    now = time.monotonic()
+    if now - _versions['checked'] > VERSION_CHECK_SECONDS:
+        versions = tuple(data.source_version(name)[1] for name in ('combined2', 'monthly', 'yearly'))
+        if os.path.exists(clusters.ASSIGNMENTS_PATH):
+            versions += (data.file_version(clusters.ASSIGNMENTS_PATH),)
+        _versions.update(checked = now, versions = versions)
+    return _versions['versions']
+
+
+# Bounded by the size of the bodies rather than their number, since one series response can be thousands of
+# times larger than a county summary. Entries do not expire; new data changes the keys.
+response_cache = ResultCache(max_bytes = RESPONSE_CACHE_MAX_BYTES, ttl = None)
+
+
+def encode(route, args):
+    # (etag, json body, gzipped body or None)
+    body = json.dumps(ROUTES[route](*args), separators = (',', ':')).encode()
+    etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+    compressed = gzip.compress(body, compresslevel = 6) if len(body) >= MIN_GZIP_BYTES else None
+    return etag, body, compressed
+
+
+def render(route, args, versions):
+    # Encoded once per request and data version
+    return response_cache.get_or_compute((route, args, versions), lambda: encode(route, args))
+
+
+class JSONHandler(tornado.web.RequestHandler):
+
+    def compute_etag(self):
+        # Set from the response cache instead of hashing every body again
+        return None
+
+    def respond(self, route, *args):
+        try:
+            etag, body, compressed = render(route, args, data_versions())
+        except KeyError:
+            raise tornado.web.HTTPError(404)
+        except BadRequest as e:
+            raise tornado.web.HTTPError(400, reason = str(e))
+        except FileNotFoundError as e:
+            # A table build_data.py has not written yet
+            raise tornado.web.HTTPError(503, reason = str(e))
+        self.set_header('Content-Type', 'application/json')
+        self.set_header('ETag', etag)
+        self.set_header('Cache-Control', 'no-cache')
+        self.set_header('Vary', 'Accept-Encoding')
+        if etag in self.request.headers.get('If-None-Match', ''):
+            self.set_status(304)
+            return
+        if compressed is not None and 'gzip' in self.request.headers.get('Accept-Encoding', ''):
+            self.set_header('Content-Encoding', 'gzip')
+            body = compressed
+        self.write(body)
+
+    def write_error(self, status_code, **kwargs):
+        self.set_header('Content-Type', 'application/json')
+        self.finish(json.dumps({'status': status_code, 'error': self._reason}))
+
+
+class CountiesHandler(JSONHandler):
+    def get(self):
+        self.respond('counties')
+
+
+class CountyHandler(JSONHandler):
+    def get(self, county_fips):
+        self.respond('county', county_fips)
+
+
+class ClustersHandler(JSONHandler):
+    def get(self, county_fips):
+        self.respond('clusters', county_fips)
+
+
+class SeriesHandler(JSONHandler):
+    def get(self, county_fips, name):
+        try:
+            start = self.get_argument('start', None)
+            end = self.get_argument('end', None)
+            start = int(start) if start else None
+            end = int(end) if end else None
+        except ValueError:
+            raise tornado.web.HTTPError(400, reason = 'start and end must be years')
+        columns = self.get_argument('columns', '')
+        columns = tuple(sorted(c for c in columns.split(',') if c))
+        self.respond('series', name, county_fips, start, end, columns)
+
+
+def make_app():
+    return tornado.web.Application([
+        (r'/api/counties', CountiesHandler),
+        (r'/api/counties/(\d{5}|\d{11})', CountyHandler),
+        (r'/api/counties/(\d{5}|\d{11})/clusters', ClustersHandler),
+        (r'/api/counties/(\d{5}|\d{11})/series/(monthly|yearly)', SeriesHandler),
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Serve the water usage data as JSON.')
+    parser.add_argument('--port', type = int, default = DEFAULT_PORT)
+    parser.add_argument('--address', default = '127.0.0.1')
+    parser.add_argument('--processes', type = int, default = 1,
+                        help = 'server processes sharing the port, 0 for one per core (default: 1)')
+    args = parser.parse_args()
+    # Load everything up front so the first requests do not pay for it; forked processes share the
+    # memory-mapped series
+    data.load_county_index()
+    try:
+        clusters.load_assignments()
+    except FileNotFoundError as e:
+        print(f"cluster labels unavailable: {e}")
+    for name in timeseries.STORES:
+        timeseries.load_store(name)
+    sockets = tornado.netutil.bind_sockets(args.port, args.address)
+    print(f"serving on http://{args.address}:{args.port}/api/counties")
+    if args.processes != 1:
+        tornado.process.fork_processes(args.processes or None)
+    server = tornado.httpserver.HTTPServer(make_app(), xheaders = True)
+    server.add_sockets(sockets)
+    tornado.ioloop.IOLoop.current().start()
+
+
+if __name__ == '__main__':
+    main()
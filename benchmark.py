@@ -0,0 +1,275 @@
+import argparse
+import functools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import plotly.express as px
+import streamlit as st
+import streamlit.components.v1 as components
+from streamlit.testing.v1 import AppTest
+
+import anomalies
+import charts
+import clusters
+import data
+import forecasts
+import geo
+import similarity
+import timeseries
+import trends
+
+
+# Headless latency benchmark of every page of app.py, run from the same directory as `streamlit run app.py`:
+#   python benchmark.py run [--pages <page> ...] [--repeat 5] [--out <file>]
+#   python benchmark.py compare <old.json> <new.json> [--threshold 1.2]
+#
+# Every page is run once for each option of its select_status radio (and for the extra widget settings in
+# VARIANTS) through streamlit's AppTest harness. The cold run starts with every st.cache_resource cleared, as
+# after a server restart; chart images spilled to disk and the files written by build_data.py are kept. The warm
+# runs repeat the same rerun with the caches filled. Each run's time is split into data loading, model fitting,
+# rendering and everything else by timing the functions listed in CATEGORIES.
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+BENCHMARK_DIR = os.path.join(data.BUILD_DIR, 'benchmarks')
+FORMAT = 1
+
+# Page -> label of its select_status radio, if it has one
+PAGES = {
+    'About': None,
+    'Exploratory Data Analysis': None,
+    'Time Series': 'Select a time series chart',
+    'National Trends': None,
+    'Interactive Maps': None,
+    'Cluster Charts': 'Model type',
+    'Data Frame': None,
+}
+# Other sidebar radio settings each select_status option is also measured with, besides the defaults
+VARIANTS = {
+    'Time Series': [{'Chart style': 'Interactive'}, {'View': 'Compare counties'}],
+}
+WARM_RUNS = 5
+TIMEOUT_SECONDS = 600
+
+# Functions timed under each category. A timed call inside another one is only counted under its own category.
+CATEGORIES = {
+    'data_load': [
+        (module, name) for module in (data, timeseries, geo, anomalies, trends, forecasts, clusters, similarity)
+        for name in dir(module) if name.startswith('load_')
+    ] + [
+        (timeseries.SeriesStore, 'county'), (timeseries.SeriesStore, 'counties'), (trends, 'ranking'),
+        (anomalies, 'current_anomalies'), (forecasts, 'county_forecast'), (similarity, 'similar_counties'),
+        (geo, 'neighbor_comparison'),
+    ],
+    'model_fit': [
+        (clusters, 'fit_kmeans'), (clusters, 'get_dbscan_params'), (clusters, 'build_assignments'),
+        (similarity, 'build_index'), (trends, 'build_trends'), (anomalies, 'build_anomalies'),
+        (forecasts, 'build_forecasts'),
+    ],
+    'render': [
+        (charts, name) for name in dir(charts) if name.startswith(('plot_', 'interactive_'))
+    ] + [
+        (charts, 'figure_png'), (px, 'choropleth'), (components, 'html'),
+        (st, 'pyplot'), (st, 'plotly_chart'), (st, 'image'), (st, 'dataframe'),
+    ],
+}
+
+
+class Timers:
+    # Exclusive time per category, summed over every timed call since the last reset
+
+    def __init__(self):
+        self.totals = defaultdict(float)
+        self.local = threading.local()
+
+    def wrap(self, category, func):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            # Each open call collects the time of the timed calls made inside it
+            stack = self.local.__dict__.setdefault('stack', [])
+            stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                self.totals[category] += elapsed - stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+        return timed
+
+    def install(self):
+        for category, functions in CATEGORIES.items():
+            for owner, name in functions:
+                setattr(owner, name, self.wrap(category, getattr(owner, name)))
+
+    def reset(self):
+        self.totals.clear()
+
+    def split(self, total):
+        split = {category: self.totals[category] for category in CATEGORIES}
+        split['other'] = max(total - sum(split.values()), 0.0)
+        return split
+
+
+def widget(at, label):
+    for element in list(at.sidebar.selectbox) + list(at.sidebar.radio):
+        if element.label == label:
+            return element
+    raise KeyError(f"no sidebar widget labeled {label!r}")
+
+
+def scenarios(pages):
+    # (page, select_status option or None, extra radio settings), reading the options from the app itself
+    at = AppTest.from_file(APP_PATH, default_timeout = TIMEOUT_SECONDS).run()
+    for page in pages:
+        statuses = [None]
+        if PAGES[page] is not None:
+            widget(at, 'Page').set_value(page)
+            at.run()
+            statuses = list(widget(at, PAGES[page]).options)
+        for status in statuses:
+            for variant in [{}] + VARIANTS.get(page, []):
+                yield page, status, variant
+
+
+def timed_run(at, timers):
+    timers.reset()
+    start = time.perf_counter()
+    at.run()
+    total = time.perf_counter() - start
+    return dict(total = total, **timers.split(total))
+
+
+def measure(page, status, variant, timers, repeat = WARM_RUNS):
+    at = AppTest.from_file(APP_PATH, default_timeout = TIMEOUT_SECONDS).run()
+    widget(at, 'Page').set_value(page)
+    at.run()
+    settings = dict(variant)
+    if status is not None:
+        settings = {PAGES[page]: status, **settings}
+    for label, value in settings.items():
+        widget(at, label).set_value(value)
+        at.run()
+
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    cold = timed_run(at, timers)
+    error = [e.message for e in at.exception]
+    warm = [timed_run(at, timers) for _ in range(repeat)]
+    return {
+        'page': page,
+        'select_status': status,
+        'variant': variant,
+        'error': error[0] if error else None,
+        'cold': cold,
+        'warm': {key: statistics.median(run[key] for run in warm) for key in cold},
+        'warm_runs': [run['total'] for run in warm],
+    }
+
+
+def scenario_name(result):
+    name = ' / '.join(part for part in (result['page'], result['select_status']) if part)
+    return name + ''.join(f" [{label}: {value}]" for label, value in result['variant'].items())
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output = True, text = True,
+                                cwd = os.path.dirname(APP_PATH)).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'streamlit': st.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'commit': commit,
+        'counties': len(data.load_county_index().records),
+        'monthly_rows': int(sum(stop - start for start, stop in timeseries.load_store('monthly').offsets.values())),
+    }
+
+
+def run(pages, repeat, out_path):
+    timers = Timers()
+    timers.install()
+    results = []
+    for page, status, variant in scenarios(pages):
+        result = measure(page, status, variant, timers, repeat)
+        results.append(result)
+        note = f"  error: {result['error']}" if result['error'] else ''
+        print(f"{scenario_name(result):<90} cold {result['cold']['total']:7.3f}s  warm {result['warm']['total']:7.3f}s{note}")
+
+    report = {
+        'format': FORMAT,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'warm_runs': repeat,
+        'environment': environment(),
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok = True)
+    with data.atomic_write(out_path, 'w') as f:
+        json.dump(report, f, indent = 1)
+    print(f"wrote {out_path}")
+    return report
+
+
+def compare(old_path, new_path, threshold, min_seconds = 0.01):
+    # Prints the change of every scenario in both files; returns the scenarios whose cold or warm time grew by
+    # more than `threshold` times (and by at least `min_seconds`, below which differences are noise)
+    with open(old_path) as f:
+        old = {scenario_name(result): result for result in json.load(f)['results']}
+    with open(new_path) as f:
+        new = {scenario_name(result): result for result in json.load(f)['results']}
+    regressions = []
+    for name in [name for name in new if name in old]:
+        row = []
+        for run_type in ('cold', 'warm'):
+            before, after = old[name][run_type]['total'], new[name][run_type]['total']
+            ratio = after / before if before else float('inf')
+            flag = ratio > threshold and after - before >= min_seconds
+            if flag:
+                regressions.append((name, run_type))
+            row.append(f"{run_type} {before:7.3f}s -> {after:7.3f}s ({ratio:5.2f}x){' !' if flag else '  '}")
+        print(f"{name:<90} " + '  '.join(row))
+    for name in [name for name in new if name not in old]:
+        print(f"{name:<90} new")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Measure the latency of every page of the water usage app.')
+    subparsers = parser.add_subparsers(dest = 'command', required = True)
+
+    run_parser = subparsers.add_parser('run', help = 'run every page headlessly and write the timings as json')
+    run_parser.add_argument('--pages', nargs = '+', choices = list(PAGES), default = list(PAGES), metavar = 'page',
+                            help = 'pages to measure (default: all)')
+    run_parser.add_argument('--repeat', type = int, default = WARM_RUNS,
+                            help = f"warm reruns per scenario (default: {WARM_RUNS})")
+    run_parser.add_argument('--out', help = f"output file (default: a new file in {BENCHMARK_DIR})")
+
+    compare_parser = subparsers.add_parser('compare', help = 'compare two benchmark files')
+    compare_parser.add_argument('old')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type = float, default = 1.2,
+                                help = 'slowdown ratio reported as a regression (default: 1.2)')
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        out_path = args.out or os.path.join(BENCHMARK_DIR, time.strftime('%Y%m%d-%H%M%S') + '.json')
+        run(args.pages, args.repeat, out_path)
+    else:
+        regressions = compare(args.old, args.new, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold:g}x")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+import argparse
+import os
+import time
+
+import anomalies
+import charts
+import clusters
+import data
+import forecasts
+import geo
+import similarity
+import timeseries
+import trends
+
+
+# Build step for the app's data files, run from the same directory as `streamlit run app.py`:
+#   python build_data.py parquet
+#   python build_data.py timeseries
+#   python build_data.py trends
+#   python build_data.py anomalies
+#   python build_data.py forecasts
+#   python build_data.py geojson
+#   python build_data.py adjacency
+#   python build_data.py select-k
+#   python build_data.py dbscan
+#   python build_data.py clusters
+#   python build_data.py charts
+#   python build_data.py neighbors
+
+def build_parquet(names):
+    os.makedirs(data.BUILD_DIR, exist_ok = True)
+    for name in names:
+        start = time.perf_counter()
+        df = data.read_source(name)
+        path = data.parquet_path(name)
+        data.write_parquet(df, path)
+        print(f"{name}: {len(df):,} rows -> {path} ({time.perf_counter() - start:.1f}s)")
+
+
+def build_timeseries():
+    for name in timeseries.STORES:
+        start = time.perf_counter()
+        store = timeseries.build_store(name)
+        print(f"{name}: {len(store.offsets):,} counties -> {timeseries.store_path(name)} "
+              f"({time.perf_counter() - start:.1f}s)")
+    start = time.perf_counter()
+    for resolution, store in timeseries.build_rollups().items():
+        name = timeseries.rollup_name(resolution)
+        print(f"{name}: {len(store.columns[store.date_column]):,} rows -> {timeseries.store_path(name)}")
+    print(f"rollups built in {time.perf_counter() - start:.1f}s")
+
+
+def build_trends():
+    start = time.perf_counter()
+    table = trends.build_trends()
+    print(f"{len(table):,} county trends for {table['metric'].nunique()} measures -> {trends.TRENDS_PATH} "
+          f"({time.perf_counter() - start:.1f}s)")
+
+
+def build_anomalies():
+    start = time.perf_counter()
+    store, current = anomalies.build_anomalies()
+    print(f"{len(store.columns[store.date_column]):,} county-months -> {timeseries.store_path(anomalies.ANOMALY_STORE)}")
+    print(f"{current['fips'].nunique():,} counties' latest month -> {anomalies.CURRENT_PATH} "
+          f"({time.perf_counter() - start:.1f}s)")
+
+
+def build_forecasts(workers):
+    start = time.perf_counter()
+    table = forecasts.build_forecasts(workers)
+    print(f"{len(table):,} forecast months for {table['fips'].nunique():,} counties -> {forecasts.FORECASTS_PATH} "
+          f"({time.perf_counter() - start:.1f}s)")
+
+
+def build_geojson(source, bundle):
+    os.makedirs(geo.GEO_DIR, exist_ok = True)
+    if source is None:
+        source = geo.SOURCE_PATH
+        if not os.path.exists(source):
+            print(f"downloading {geo.SOURCE_URL} -> {source}")
+            geo.fetch_source()
+    start = time.perf_counter()
+    for path in geo.build_levels(source, bundle):
+        print(f"{path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+    print(f"simplified county geometry in {time.perf_counter() - start:.1f}s")
+
+
+def build_adjacency():
+    start = time.perf_counter()
+    adjacency = geo.build_adjacency()
+    print(f"{len(adjacency.fips):,} counties, {len(adjacency.indices) // 2:,} adjacent pairs -> {geo.ADJACENCY_PATH} "
+          f"({time.perf_counter() - start:.1f}s)")
+
+
+def build_dbscan_selection(workers):
+    start = time.perf_counter()
+    for model_id, selection in clusters.select_dbscan(workers = workers).items():
+        best = [score for score in selection['scores']
+                if score['eps'] == selection['eps'] and score['min_samples'] == selection['min_samples']][0]
+        print(f"{model_id}: eps={selection['eps']} min_samples={selection['min_samples']} "
+              f"clusters={best['n_clusters']} noise={best['noise']:.1%} silhouette={best['silhouette']:.3f}")
+    print(f"DBSCAN grid search finished in {time.perf_counter() - start:.1f}s, "
+          "run `python build_data.py clusters` to apply it")
+
+
+def build_clusters(workers):
+    start = time.perf_counter()
+    assignments, centroids = clusters.build_assignments(workers)
+    print(f"{len(assignments):,} cluster assignments -> {clusters.ASSIGNMENTS_PATH}")
+    print(f"{len(centroids):,} centroids -> {clusters.CENTROIDS_PATH} ({time.perf_counter() - start:.1f}s)")
+
+
+def build_k_selection(k_max, seeds, sample_size, workers):
+    start = time.perf_counter()
+    selections = clusters.select_k(k_values = range(2, k_max + 1), seeds = seeds, sample_size = sample_size,
+                                   workers = workers)
+    for model_id, selection in selections.items():
+        best = max(score['silhouette'] for score in selection['scores'] if score['k'] == selection['n_clusters'])
+        print(f"{model_id}: k={selection['n_clusters']} seed={selection['random_state']} silhouette={best:.3f}")
+    print(f"model selection finished in {time.perf_counter() - start:.1f}s, "
+          "run `python build_data.py clusters` to apply it")
+
+
+def build_charts(min_year, out_dir, workers, limit):
+    start = time.perf_counter()
+    fips = sorted(data.load_county_index().records)[:limit]
+    manifest = charts.prerender(min_year, out_dir, workers, fips)
+    n_charts = sum(len(entry['charts']) for entry in manifest['counties'])
+    print(f"{n_charts:,} charts for {len(manifest['counties']):,} counties -> {out_dir} "
+          f"({time.perf_counter() - start:.1f}s)")
+
+
+def build_neighbors():
+    start = time.perf_counter()
+    index = similarity.build_index()
+    print(f"{len(index.trees)} feature group combinations over {len(index.fips):,} counties -> "
+          f"{clusters.MODEL_DIR} ({time.perf_counter() - start:.1f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Build derived data files for the water usage app.')
+    subparsers = parser.add_subparsers(dest = 'command', required = True)
+
+    parquet = subparsers.add_parser('parquet', help = 'convert the csv sources to typed parquet files')
+    parquet.add_argument('names', nargs = '*', metavar = 'name',
+                         help = f"sources to convert, any of {', '.join(data.SOURCES)} (default: all)")
+
+    subparsers.add_parser('timeseries', help = 'write the monthly and yearly series partitioned by FIPS, plus the monthly rollups')
+
+    subparsers.add_parser('trends', help = 'compute the temperature and drought trend of every county')
+
+    subparsers.add_parser('anomalies', help = 'standardize every county-month against its monthly climatology')
+
+    forecasts_parser = subparsers.add_parser('forecasts', help = 'fit a seasonal model to every county and store forecasts')
+    forecasts_parser.add_argument('--workers', type = int, help = 'worker processes (default: one per core)')
+
+    geojson = subparsers.add_parser('geojson', help = 'store the county geometry locally and build simplified levels')
+    geojson.add_argument('--source', help = f"local county geojson to start from (default: {geo.SOURCE_PATH}, "
+                                            "downloaded once if missing)")
+    geojson.add_argument('--bundle', action = 'store_true',
+                         help = f"also write the low level to {geo.BUNDLED_PATH} to commit with the app")
+
+    subparsers.add_parser('adjacency', help = 'derive the county adjacency graph from the stored geometry')
+
+    select_k = subparsers.add_parser('select-k', help = 'choose k for every cluster model by silhouette score')
+    select_k.add_argument('--k-max', type = int, default = max(clusters.K_VALUES),
+                          help = f"largest k to try (default: {max(clusters.K_VALUES)})")
+    select_k.add_argument('--seeds', type = int, nargs = '+', default = list(clusters.SEEDS),
+                          help = 'KMeans seeds to try for every k')
+    select_k.add_argument('--sample-size', type = int, default = clusters.SILHOUETTE_SAMPLE_SIZE,
+                          help = 'counties sampled for each silhouette score')
+    select_k.add_argument('--workers', type = int, help = 'worker processes (default: one per core)')
+
+    dbscan = subparsers.add_parser('dbscan', help = 'grid search DBSCAN eps/min_samples for every cluster model')
+    dbscan.add_argument('--workers', type = int, help = 'worker processes (default: one per core)')
+
+    clusters_parser = subparsers.add_parser('clusters', help = 'fit every cluster model and write the county label table')
+    clusters_parser.add_argument('--workers', type = int,
+                                 help = 'worker processes for a DBSCAN grid search that has not been run yet')
+
+    charts_parser = subparsers.add_parser('charts', help = 'pre-render the report charts for every county')
+    charts_parser.add_argument('--min-year', type = int, default = charts.MIN_YEAR,
+                               help = f"first year on the time series charts (default: {charts.MIN_YEAR})")
+    charts_parser.add_argument('--out', default = charts.REPORT_DIR, help = 'asset directory to write')
+    charts_parser.add_argument('--workers', type = int, help = 'worker processes (default: one per core)')
+    charts_parser.add_argument('--limit', type = int, help = 'only render the first N counties')
+
+    subparsers.add_parser('neighbors', help = 'build the similar counties search index')
+
+    args = parser.parse_args()
+    if args.command == 'parquet':
+        unknown = set(args.names) - set(data.SOURCES)
+        if unknown:
+            parser.error(f"unknown source(s): {', '.join(sorted(unknown))}")
+        build_parquet(args.names or list(data.SOURCES))
+    elif args.command == 'timeseries':
+        build_timeseries()
+    elif args.command == 'trends':
+        build_trends()
+    elif args.command == 'anomalies':
+        build_anomalies()
+    elif args.command == 'forecasts':
+        build_forecasts(args.workers)
+    elif args.command == 'geojson':
+        build_geojson(args.source, args.bundle)
+    elif args.command == 'adjacency':
+        build_adjacency()
+    elif args.command == 'select-k':
+        if not 2 <= args.k_max <= len(clusters.CLUSTER_COLORS):
+            parser.error(f"--k-max must be between 2 and {len(clusters.CLUSTER_COLORS)}")
+        build_k_selection(args.k_max, args.seeds, args.sample_size, args.workers)
+    elif args.command == 'dbscan':
+        build_dbscan_selection(args.workers)
+    elif args.command == 'clusters':
+        build_clusters(args.workers)
+    elif args.command == 'charts':
+        build_charts(args.min_year, args.out, args.workers, args.limit)
+    elif args.command == 'neighbors':
+        build_neighbors()
+
+
+if __name__ == '__main__':
+    main()
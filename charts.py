@@ -0,0 +1,504 @@
+import hashlib
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib.pyplot as plt
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+import streamlit as st
+
+import anomalies as anomaly_detection
+import clusters
+import data
+import forecasts
+import results
+import timeseries
+
+
+# Rendered chart images, kept in a bounded LRU shared by every session (see results.py). Entries evicted from
+# memory are spilled to disk (set CHART_CACHE_DIR to None to turn that off) and promoted back on the next hit.
+# The least recently used images on disk are deleted once the directory holds more than CHART_SPILL_MAX_BYTES,
+# which also clears out images of old data versions.
+CHART_CACHE_MAX_BYTES = 64 * 1024 * 1024
+CHART_CACHE_DIR = os.path.join(data.BUILD_DIR, 'chart-cache')
+CHART_SPILL_MAX_BYTES = 1024 * 1024 * 1024
+
+# First year shown on the Time Series charts
+MIN_YEAR = 2010
+
+# Most points drawn per line on the interactive charts; longer windows are reduced with timeseries.lttb
+INTERACTIVE_POINTS = 1000
+
+# Panels per row in the small multiples comparison
+COMPARE_COLUMNS_PER_ROW = 4
+
+# Static county report charts written by `python build_data.py charts`, one directory per FIPS plus manifest.json
+REPORT_DIR = os.path.join(data.BUILD_DIR, 'reports')
+
+
+def figure_png(fig):
+    # Same settings st.pyplot uses, so cached images look exactly like the live ones
+    buf = io.BytesIO()
+    fig.savefig(buf, format = 'png', bbox_inches = 'tight', dpi = 200)
+    plt.close(fig)
+    return buf.getvalue()
+
+
+def chart_key(chart, county_fips, min_year, max_year, *stores, versions = ()):
+    # Cache key shared by the app and the batch pre-renderer; versions are (name, version) of other tables drawn.
+    # A store passed as None (anomalies outside monthly views) is not drawn and not part of the key.
+    stores = tuple((store.name, store.version) for store in stores if store is not None)
+    return (chart, county_fips, min_year, max_year) + stores + tuple(versions)
+
+
+def default_range(mon, county_fips, min_year = MIN_YEAR):
+    # (min_year, max_year, resolution) the Time Series page opens with; also what the pre-renderer draws
+    first_year, last_year = mon.year_range(county_fips)
+    min_year = min(max(first_year, min_year), last_year)
+    return min_year, last_year, timeseries.range_resolution(min_year, last_year)
+
+
+TEMP_LINES = [('min_temp', '#EED78D', 'Low Temp (F)'), ('max_temp', '#C22B26', 'High Temp (F)'),
+              ('mean_temp', '#FFB632', 'Mean Temp (F)')]
+DROUGHT_LINES = [('exceptional_drought', '#C22B26', 'Exceptional Drought'), ('extreme_plus', '#D58900', 'Extreme Drought'),
+                 ('severe_plus', '#FFB632', 'Severe Drought'), ('moderate_plus', '#EED78D', 'Moderate Drought')]
+
+
+# Measure whose anomalous months and forecast are shown on each county chart
+HEADLINE_COLUMNS = {'temperature': 'mean_temp', 'drought': 'moderate_plus'}
+ANOMALY_LABEL = f"Anomalous Month (over {anomaly_detection.THRESHOLD:g} sd from normal)"
+
+
+def anomaly_points(df, column, anomalies, county_fips, min_year, max_year):
+    # The chart's values in the months flagged in the precomputed anomaly store; only monthly views are marked
+    if anomalies is None or f'{column}_min' in df:
+        return df[column].iloc[:0]
+    months = anomaly_detection.anomalous_months(anomalies, county_fips, column, min_year, max_year)
+    return df[column].loc[df.index.intersection(months)]
+
+
+def plot_forecast(column, county_fips, color):
+    # Stored forecast of the measure with its 80% and 95% intervals, after the last month of data
+    fc = forecasts.county_forecast(county_fips, column)
+    if len(fc):
+        plt.fill_between(fc.index, fc['lower_95'], fc['upper_95'], color = color, alpha = 0.15)
+        plt.fill_between(fc.index, fc['lower_80'], fc['upper_80'], color = color, alpha = 0.3,
+                         label = 'Forecast (80% and 95% intervals)')
+        plt.plot(fc['forecast'], c = color, ls = '--')
+
+
+def add_forecast_traces(fig, column, county_fips, color):
+    fc = forecasts.county_forecast(county_fips, column)
+    for coverage, opacity in (('95', 0.15), ('80', 0.3)):
+        fig.add_trace(go.Scatter(x = fc.index, y = fc[f'lower_{coverage}'], mode = 'lines', line = {'width': 0},
+                                 legendgroup = 'forecast', showlegend = False, hoverinfo = 'skip'))
+        fig.add_trace(go.Scatter(x = fc.index, y = fc[f'upper_{coverage}'], mode = 'lines', line = {'width': 0},
+                                 fill = 'tonexty', fillcolor = color, opacity = opacity, legendgroup = 'forecast',
+                                 name = f'Forecast {coverage}% interval'))
+    fig.add_trace(go.Scatter(x = fc.index, y = fc['forecast'], mode = 'lines', name = 'Forecast',
+                             legendgroup = 'forecast', line = {'color': color, 'dash': 'dash'}))
+
+
+def range_columns(store, lines):
+    # Columns for the given lines, plus their _min and _max when the store is a seasonal or annual rollup
+    columns = [column for column, _, _ in lines]
+    return columns + [f'{c}_{stat}' for c in columns for stat in ('min', 'max') if f'{c}_{stat}' in store.columns]
+
+
+def plot_bands(df, lines):
+    # Shaded min-max range behind each mean line of a rollup
+    for column, color, _ in lines:
+        if f'{column}_min' in df:
+            plt.fill_between(df.index, df[f'{column}_min'], df[f'{column}_max'], color = color, alpha = 0.2)
+
+
+## Time Series Citation: Bob Adams
+# Time series plotting functions, shared by the Time Series page and the batch pre-renderer. `mon` is the
+# monthly store or one of its rollups (see timeseries.load_rollup)
+def plot_temp_trends_county(county_fips, min_year, county, state, mon = None, year = None, max_year = None,
+                            anomalies = None, forecast = False):
+    if mon is None:
+        mon = timeseries.load_store('monthly')
+    if year is None:
+        year = timeseries.load_store('yearly')
+
+    # Filtered Monthly Summary View, already in Fahrenheit (see data.py)
+    county_month_view_df = mon.county(county_fips, min_year, range_columns(mon, TEMP_LINES), max_year)
+
+    # Annual Summary from Daily Data
+    county_year_view_df = year.county(county_fips, min_year, ['Tmean_F'], max_year)
+
+    #cite: Time Series in Pandas Lesson
+
+    # Plot
+    fig = plt.figure(figsize = (12,8))
+    plot_bands(county_month_view_df, TEMP_LINES)
+    plt.plot(county_month_view_df['min_temp'], c = '#EED78D', label = 'Low Temp (F)')
+    plt.plot(county_month_view_df['max_temp'], c = '#C22B26',  label = 'High Temp (F)')
+    plt.plot(county_month_view_df['mean_temp'], c = '#FFB632',  label = 'Mean Temp (F)')
+    plt.plot(county_year_view_df['Tmean_F'], c = 'k', label = 'Annual Mean Temp (F)',)
+    points = anomaly_points(county_month_view_df, HEADLINE_COLUMNS['temperature'], anomalies, county_fips, min_year, max_year)
+    if len(points):
+        plt.scatter(points.index, points, s = 80, facecolors = 'none', edgecolors = 'k', zorder = 3, label = ANOMALY_LABEL)
+    if forecast:
+        plot_forecast(HEADLINE_COLUMNS['temperature'], county_fips, '#FFB632')
+
+    plt.title(f"Temperature Trend for {county} County, {state}")
+    plt.yticks(fontsize = 12)
+    plt.xticks(fontsize = 12)
+    plt.ylabel('Average Monthly Temperature (F)', fontsize = 12)
+    plt.legend()
+    return figure_png(fig)
+
+
+def plot_drought_trends_county(county_fips, min_year, county, state, mon = None, max_year = None, anomalies = None,
+                               forecast = False):
+    if mon is None:
+        mon = timeseries.load_store('monthly')
+
+    # Filtered Monthly Summary View, with the cumulative drought columns computed at load time (see data.py)
+    county_month_view_df = mon.county(county_fips, min_year, range_columns(mon, DROUGHT_LINES), max_year)
+
+    #cite: Time Series in Pandas Lesson
+
+    # Plot
+    fig = plt.figure(figsize = (12,8))
+    plot_bands(county_month_view_df, DROUGHT_LINES)
+    plt.plot(county_month_view_df['exceptional_drought'], c = '#C22B26', label = 'Exceptional Drought')
+    plt.plot(county_month_view_df['extreme_plus'], c = '#D58900',  label = 'Extreme Drought')
+    plt.plot(county_month_view_df['severe_plus'], c = '#FFB632',  label = 'Severe Drought')
+    plt.plot(county_month_view_df['moderate_plus'], c = '#EED78D',  label = 'Moderate Drought')
+    points = anomaly_points(county_month_view_df, HEADLINE_COLUMNS['drought'], anomalies, county_fips, min_year, max_year)
+    if len(points):
+        plt.scatter(points.index, points, s = 80, facecolors = 'none', edgecolors = 'k', zorder = 3, label = ANOMALY_LABEL)
+    if forecast:
+        plot_forecast(HEADLINE_COLUMNS['drought'], county_fips, '#EED78D')
+
+    plt.title(f"Average Minimum Drought Condition for {county} County, {state}")
+    plt.yticks(fontsize = 12)
+    plt.xticks(fontsize = 12)
+    plt.ylabel('Percent Population Experiencing Designated Drought Condition or Worse', fontsize = 12)
+    plt.legend()
+    return figure_png(fig)
+
+
+def interactive_figure(traces, points, title, ylabel, marked = None):
+    # WebGL line chart of (frame, column, color, label) traces, each downsampled to at most `points` points.
+    # Rollups also get their min-max range as a band sampled at the same dates as the mean.
+    fig = go.Figure()
+    for frame, column, color, label in traces:
+        keep = timeseries.lttb(frame.index.asi8, frame[column].to_numpy(), points)
+        dates = frame.index[keep]
+        if f'{column}_min' in frame:
+            fig.add_trace(go.Scattergl(x = dates, y = frame[f'{column}_min'].to_numpy()[keep], mode = 'lines',
+                                       line = {'width': 0}, legendgroup = label, showlegend = False, hoverinfo = 'skip'))
+            fig.add_trace(go.Scattergl(x = dates, y = frame[f'{column}_max'].to_numpy()[keep], mode = 'lines',
+                                       line = {'width': 0}, fill = 'tonexty', fillcolor = color, opacity = 0.2,
+                                       legendgroup = label, showlegend = False, hoverinfo = 'skip'))
+        fig.add_trace(go.Scattergl(x = dates, y = frame[column].to_numpy()[keep], mode = 'lines', name = label,
+                                   legendgroup = label, line = {'color': color}))
+    if marked is not None and len(marked):
+        fig.add_trace(go.Scattergl(x = marked.index, y = marked, mode = 'markers', name = ANOMALY_LABEL,
+                                   marker = {'symbol': 'circle-open', 'size': 12, 'color': 'black'}))
+    fig.update_layout(title = title, yaxis_title = ylabel, height = 600, hovermode = 'x unified')
+    return fig
+
+
+def interactive_temp_trends_county(county_fips, min_year, max_year, county, state, mon, year, anomalies = None,
+                                   forecast = False, points = INTERACTIVE_POINTS):
+    county_month_view_df = mon.county(county_fips, min_year, range_columns(mon, TEMP_LINES), max_year)
+    county_year_view_df = year.county(county_fips, min_year, ['Tmean_F'], max_year)
+    traces = [(county_month_view_df, column, color, label) for column, color, label in TEMP_LINES]
+    traces.append((county_year_view_df, 'Tmean_F', 'black', 'Annual Mean Temp (F)'))
+    marked = anomaly_points(county_month_view_df, HEADLINE_COLUMNS['temperature'], anomalies, county_fips, min_year, max_year)
+    fig = interactive_figure(traces, points, f"Temperature Trend for {county} County, {state}",
+                             'Average Monthly Temperature (F)', marked)
+    if forecast:
+        add_forecast_traces(fig, HEADLINE_COLUMNS['temperature'], county_fips, '#FFB632')
+    return fig
+
+
+def interactive_drought_trends_county(county_fips, min_year, max_year, county, state, mon, anomalies = None,
+                                      forecast = False, points = INTERACTIVE_POINTS):
+    county_month_view_df = mon.county(county_fips, min_year, range_columns(mon, DROUGHT_LINES), max_year)
+    traces = [(county_month_view_df, column, color, label) for column, color, label in DROUGHT_LINES]
+    marked = anomaly_points(county_month_view_df, HEADLINE_COLUMNS['drought'], anomalies, county_fips, min_year, max_year)
+    fig = interactive_figure(traces, points, f"Average Minimum Drought Condition for {county} County, {state}",
+                             'Percent Population in Condition or Worse', marked)
+    if forecast:
+        add_forecast_traces(fig, HEADLINE_COLUMNS['drought'], county_fips, '#D58900')
+    return fig
+
+
+def interactive_county_comparison(fips, column, label, min_year, max_year, mon, layout = 'overlay', highlight = None,
+                                  points = INTERACTIVE_POINTS):
+    # One metric for many counties, read in a single grouped gather from the store, as overlaid lines or
+    # small multiples. The median across the selection is drawn for reference and `highlight` is emphasised.
+    county_index = data.load_county_index()
+    df = mon.counties(fips, min_year, [column], max_year)
+    wide = df.reset_index().pivot(index = mon.date_column, columns = 'fips', values = column)
+    median = wide.median(axis = 1)
+    names = {code: f"{county_index.record(code)['countyname']}, {county_index.record(code)['state']}"
+             for code in wide.columns}
+
+    if layout == 'overlay':
+        n_rows = 1
+        fig = make_subplots(rows = 1, cols = 1)
+        panels = [(code, 1, 1) for code in wide.columns]
+    else:
+        n_rows = max(1, -(-len(wide.columns) // COMPARE_COLUMNS_PER_ROW))
+        fig = make_subplots(rows = n_rows, cols = COMPARE_COLUMNS_PER_ROW, shared_xaxes = True, shared_yaxes = True,
+                            subplot_titles = [names[code] for code in wide.columns], vertical_spacing = 0.3 / n_rows)
+        panels = [(code, i // COMPARE_COLUMNS_PER_ROW + 1, i % COMPARE_COLUMNS_PER_ROW + 1)
+                  for i, code in enumerate(wide.columns)]
+
+    keep = timeseries.lttb(median.index.asi8, median.to_numpy(), points)
+    for i, (code, row, col) in enumerate(panels):
+        series = wide[code].dropna()
+        selected = timeseries.lttb(series.index.asi8, series.to_numpy(), points)
+        line = {'color': '#C22B26', 'width': 3} if code == highlight else {'width': 1}
+        fig.add_trace(go.Scattergl(x = series.index[selected], y = series.to_numpy()[selected], mode = 'lines',
+                                   name = names[code], line = line, opacity = 1 if code == highlight else 0.7,
+                                   showlegend = layout == 'overlay'), row = row, col = col)
+        if layout != 'overlay' or i == 0:
+            fig.add_trace(go.Scattergl(x = median.index[keep], y = median.to_numpy()[keep], mode = 'lines',
+                                       name = 'Median of selection', line = {'color': 'black', 'dash': 'dot'},
+                                       showlegend = i == 0), row = row, col = col)
+
+    fig.update_layout(title = f"{label} for {len(wide.columns)} Counties", hovermode = 'closest',
+                      height = 600 if layout == 'overlay' else max(600, 220 * n_rows))
+    return fig
+
+
+def plot_cluster_membership(county_fips, county, state):
+    # Scaled distance from the county to every KMeans centroid, one panel per model; its own cluster is outlined
+    assignments = clusters.load_assignments()
+    fig, ax = plt.subplots(1, len(clusters.MODEL_IDS), figsize = (16, 4))
+    for i, (name, model_id) in enumerate(clusters.MODEL_IDS.items()):
+        row = assignments[model_id, 'kmeans'][0].loc[county_fips]
+        labels = [int(c.split('_')[1]) for c in row.index if c.startswith('distance_')]
+        distances = [row[f'distance_{label}'] for label in labels]
+        bars = ax[i].bar([str(label) for label in labels], distances,
+                         color = [clusters.cluster_color(label) for label in labels])
+        bars[labels.index(int(row['cluster']))].set(edgecolor = 'black', linewidth = 3)
+        ax[i].set_title(name, fontsize = 9, wrap = True)
+        ax[i].set_xlabel('Cluster')
+    ax[0].set_ylabel('Distance to centroid (scaled)')
+    fig.suptitle(f"Cluster Membership for {county} County, {state}")
+    fig.tight_layout()
+    return figure_png(fig)
+
+
+# Scatter panels of every cluster model on the Cluster Charts page: figure size, font size of the labels and,
+# per panel, the x and y columns, title and axis labels
+CLUSTER_PANELS = {
+    'public_supply': ((10, 8), None, [
+        ('ps_wtotl', 'do_psdel', 'Water Supply and Use', 'Water Amount Withdrawn for Public Supply (Mgal/d)',
+         'Domestic Use From Public Supply (Mgal/d)'),
+    ]),
+    'irrigation': ((10, 8), None, [
+        ('ic_wfrto', 'ig_wfrto', 'Irrigation Water Withdrawl: Crops vs. Golf',
+         'Irrigation-Crop Water Amount Withdrawn (Mgal/d)', 'Irrigation-Golf Water Amount Withdrawn (Mgal/d)'),
+        ('ic_wfrto', 'ic_recww', 'Irrigation Water Amount Reclaimed', 'Irrigation Water Amount Withdrawn (Mgal/d)',
+         'Irrigation Wastewater Amount Reclaimed (Mgal/d)'),
+    ]),
+    'total_withdrawal': ((16, 8), 13, [
+        ('to_wtotl', 'do_psdel', 'Total Water Withdrawal and Domestic Use from Public Supply Delivery',
+         'Total Water Withdrawal (Mgal/d)', 'Domestic Use From Public Supply (Mgal/d)'),
+        ('to_wtotl', 'ps_wtotl', 'Total Water Withdrawal and Public Supply Water Withdrawal',
+         'Total Water Withdrawal (Mgal/d)', 'Public Supply Water Withdrawal'),
+    ]),
+    'income': ((16, 8), 13, [
+        ('population', 'median_household_income', 'Population and Income', 'Population', 'Median Household Income'),
+    ]),
+}
+
+
+def plot_cluster_chart(model_id, method):
+    # Every county colored by its cluster, with the centroids as stars; the same for every selected county
+    figsize, fontsize, panels = CLUSTER_PANELS[model_id]
+    df = data.load_combined2()
+    df = df.assign(cluster = clusters.cluster_labels(model_id, df['fips'], method))
+    df['color'] = df['cluster'].map(clusters.cluster_color)
+    centroids = clusters.cluster_centroids(model_id, method)
+    colors = [clusters.cluster_color(c) for c in centroids.index]
+
+    fig, axes = plt.subplots(1, len(panels), figsize = figsize, squeeze = False)
+    for ax, (x, y, title, xlabel, ylabel) in zip(axes[0], panels):
+        # Plot points
+        df.plot(kind = "scatter", x = x, y = y, c = df['color'], ax = ax)
+        # Plot Centroids
+        centroids.plot(kind = "scatter", x = x, y = y, marker = "*", c = colors, s = 300, edgecolor = 'black', ax = ax)
+        # Labels
+        ax.set_title(title, fontsize = fontsize)
+        ax.set_xlabel(xlabel, fontsize = fontsize)
+        ax.set_ylabel(ylabel, fontsize = fontsize)
+    return figure_png(fig)
+
+
+class ChartCache(results.ResultCache):
+    # Result cache of chart images that spills evicted entries to disk and promotes them back on the next hit
+
+    def __init__(self, max_bytes = CHART_CACHE_MAX_BYTES, spill_dir = CHART_CACHE_DIR,
+                 spill_max_bytes = CHART_SPILL_MAX_BYTES):
+        # Keyed by data version, so an image never goes stale
+        super().__init__(max_bytes, ttl = None)
+        self.spill_dir = spill_dir
+        self.spill_max_bytes = spill_max_bytes
+        # Bytes in spill_dir, counted from the directory on the first spill and then kept up to date
+        self.spill_bytes = None
+        self.disk_hits = 0
+
+    def spill_path(self, key):
+        return os.path.join(self.spill_dir, hashlib.sha1(repr(key).encode()).hexdigest() + '.png')
+
+    def miss(self, key, default = None):
+        if self.spill_dir is not None:
+            path = self.spill_path(key)
+            try:
+                with open(path, 'rb') as f:
+                    value = f.read()
+                # A disk hit counts as a use, so prune_spill keeps the file
+                os.utime(path)
+            except FileNotFoundError:
+                # Never spilled, or pruned by this or another process
+                pass
+            else:
+                with self.lock:
+                    self.disk_hits += 1
+                self.put(key, value)
+                return value
+        return super().miss(key, default)
+
+    def evicted(self, key, value):
+        self.spill(key, value)
+
+    def spill(self, key, value):
+        # Also used by the batch pre-renderer to warm the cache on disk
+        if self.spill_dir is None:
+            return
+        path = self.spill_path(key)
+        if not os.path.exists(path):
+            os.makedirs(self.spill_dir, exist_ok = True)
+            with data.atomic_write(path) as f:
+                f.write(value)
+            with self.lock:
+                if self.spill_bytes is not None:
+                    self.spill_bytes += len(value)
+            if self.spill_bytes is None or self.spill_bytes > self.spill_max_bytes:
+                self.prune_spill()
+
+    def prune_spill(self):
+        # Deletes the images least recently written or read until the directory is within spill_max_bytes.
+        # Other processes (the app's server processes, the pre-renderer) share the directory, so it is scanned
+        # again rather than trusting spill_bytes.
+        files = []
+        with os.scandir(self.spill_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith('.png'):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.spill_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        with self.lock:
+            self.spill_bytes = total
+
+    def stats(self):
+        stats = super().stats()
+        with self.lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            stats.update(disk_hits = self.disk_hits,
+                         hit_rate = (self.hits + self.disk_hits) / lookups if lookups else 0.0)
+        return stats
+
+
+@st.cache_resource(show_spinner = False)
+def get_chart_cache():
+    return ChartCache()
+
+
+def _init_render_worker():
+    # Headless rendering in the worker processes
+    plt.switch_backend('Agg')
+
+
+def render_county_reports(task):
+    # Renders every report chart for a batch of counties, writes them to the report directory and
+    # also spills the time series charts into the chart cache so the app starts warm
+    fips_batch, start_year, out_dir = task
+    mon = timeseries.load_store('monthly')
+    year = timeseries.load_store('yearly')
+    anomalies = anomaly_detection.load_anomalies()[0]
+    county_index = data.load_county_index()
+    cache = ChartCache(max_bytes = 0)
+    entries = []
+    for county_fips in fips_batch:
+        record = county_index.record(county_fips)
+        county, state = record['countyname'], record['state']
+        renders = [('clusters', None, lambda: plot_cluster_membership(county_fips, county, state))]
+        if county_fips in mon:
+            min_year, max_year, resolution = default_range(mon, county_fips, start_year)
+            rollup = timeseries.load_rollup(resolution)
+            # Anomalous months are only marked on monthly views, as on the Time Series page
+            marked = anomalies if resolution == 'monthly' else None
+            renders += [
+                ('temperature', chart_key('temperature+forecast', county_fips, min_year, max_year, rollup, year, marked,
+                                          versions = [forecasts.forecasts_version()]),
+                 lambda: plot_temp_trends_county(county_fips, min_year, county, state, rollup, year, max_year, marked,
+                                                 forecast = True)),
+                ('drought', chart_key('drought+forecast', county_fips, min_year, max_year, rollup, marked,
+                                      versions = [forecasts.forecasts_version()]),
+                 lambda: plot_drought_trends_county(county_fips, min_year, county, state, rollup, max_year, marked,
+                                                    forecast = True)),
+            ]
+        os.makedirs(os.path.join(out_dir, county_fips), exist_ok = True)
+        files = {}
+        for chart, key, render in renders:
+            png = render()
+            files[chart] = os.path.join(county_fips, chart + '.png')
+            with open(os.path.join(out_dir, files[chart]), 'wb') as f:
+                f.write(png)
+            if key is not None:
+                cache.spill(key, png)
+        entries.append({'fips': county_fips, 'state': state, 'county': county, 'charts': files})
+    return entries
+
+
+def prerender(min_year, out_dir = REPORT_DIR, workers = None, fips = None, batch_size = 20):
+    # Renders the report charts for every county (or the given FIPS codes) across a process pool
+    county_index = data.load_county_index()
+    fips = sorted(fips or county_index.records)
+    # Fail before starting the pool if the cluster, anomaly or forecast tables have not been built
+    clusters.load_assignments()
+    anomaly_detection.load_anomalies()
+    forecasts.load_forecasts()
+    tasks = [(fips[i:i + batch_size], min_year, out_dir) for i in range(0, len(fips), batch_size)]
+
+    entries = []
+    with ProcessPoolExecutor(max_workers = workers, initializer = _init_render_worker) as executor:
+        for batch in executor.map(render_county_reports, tasks):
+            entries += batch
+
+    manifest = {
+        'generated': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'min_year': min_year,
+        'data_versions': {name: timeseries.load_store(name).version for name in timeseries.STORES},
+        'counties': entries,
+    }
+    path = os.path.join(out_dir, 'manifest.json')
+    with data.atomic_write(path, 'w') as f:
+        json.dump(manifest, f, indent = 1)
+    return manifest
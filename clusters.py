@@ -0,0 +1,486 @@
+import hashlib
+import json
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scipy import sparse
+from sklearn.cluster import DBSCAN, KMeans
+from sklearn.metrics import silhouette_score
+from sklearn.neighbors import KDTree
+from sklearn.preprocessing import StandardScaler
+from threadpoolctl import threadpool_limits
+
+import data
+
+
+# Kmeans Cluster models created by Farah Malik and Bryan Ortiz: model id -> feature columns of combined2
+MODELS = {
+    'public_supply': ['ps_wtotl', 'do_psdel'],
+    'irrigation': ['ir_wfrto', 'ir_recww', 'ic_wfrto', 'ic_recww', 'ig_wfrto', 'ig_recww'],
+    'total_withdrawal': ['to_wtotl', 'do_psdel', 'ps_wtotl'],
+    'income': ['population', 'median_household_income'],
+}
+# Chart names on the Cluster Charts page -> model id
+MODEL_IDS = {
+    'Public Supply Water Withdrawal vs. Domestic Use': 'public_supply',
+    'Irrigation Water Withdrawn vs. Wastewater Reclaimed': 'irrigation',
+    'Total Water Withdrawal vs. Water Withdrawn for Public Supply': 'total_withdrawal',
+    'Population vs. Median Income': 'income',
+}
+N_CLUSTERS = 4
+RANDOM_STATE = 42
+# Clustering methods offered on the Cluster Charts page
+METHODS = {'KMeans': 'kmeans', 'DBSCAN': 'dbscan'}
+# Enough colors for any k the model selection sweep can choose; DBSCAN noise points are drawn in black
+CLUSTER_COLORS = ["red", "green", "purple", "orange", "blue", "brown", "pink", "olive", "cyan", "gray"]
+NOISE_COLOR = "black"
+
+# Model selection sweep: candidate k values and seeds, and the silhouette sample size per fit
+K_VALUES = range(2, len(CLUSTER_COLORS) + 1)
+SEEDS = (42, 0, 1)
+SILHOUETTE_SAMPLE_SIZE = 2000
+
+# DBSCAN grid, with eps in standard deviations of the scaled features. Parameter sets that leave more than
+# MAX_NOISE of the counties unclustered are only chosen if nothing else produces clusters.
+EPS_VALUES = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5)
+MIN_SAMPLES_VALUES = (5, 10, 20)
+MAX_NOISE = 0.1
+# Largest neighbor graph (stored pairs) DBSCAN is fitted on; past it, a random sample of the counties is
+# fitted instead (see dbscan_graph), since on dense or heavy-tailed features most pairs can lie within eps
+MAX_GRAPH_PAIRS = 20_000_000
+
+# Fitted (scaler, model) pairs are pickled here, one file per feature set, k, seed and data fingerprint
+MODEL_DIR = os.path.join(data.BUILD_DIR, 'models')
+# Cluster label and distance to every centroid for each (county, model), and the centroids in data units,
+# written by `python build_data.py clusters`
+ASSIGNMENTS_PATH = os.path.join(data.BUILD_DIR, 'cluster_assignments.parquet')
+CENTROIDS_PATH = os.path.join(data.BUILD_DIR, 'cluster_centroids.parquet')
+# Fingerprint of the combined2 data the tables above were built from
+ASSIGNMENTS_SOURCE_PATH = os.path.join(data.BUILD_DIR, 'cluster_assignments.json')
+
+
+def data_fingerprint(X):
+    # Content hash of the feature values, so a refreshed data file with identical values reuses the model
+    hashes = pd.util.hash_pandas_object(X, index = False).values
+    return hashlib.sha1(hashes.tobytes()).hexdigest()[:16]
+
+
+def model_path(kind, features, n_clusters, random_state, fingerprint):
+    name = f"{kind}_{'-'.join(features)}_k{n_clusters}_s{random_state}_{fingerprint}.pkl"
+    return os.path.join(MODEL_DIR, name)
+
+
+def selection_path(model_id, fingerprint):
+    return os.path.join(MODEL_DIR, f"selection_{model_id}_{fingerprint}.json")
+
+
+def dbscan_selection_path(model_id, fingerprint):
+    return os.path.join(MODEL_DIR, f"dbscan_{model_id}_{fingerprint}.json")
+
+
+def save_json(obj, path):
+    os.makedirs(os.path.dirname(path), exist_ok = True)
+    with data.atomic_write(path, 'w') as f:
+        json.dump(obj, f, indent = 2)
+
+
+def save_pickle(obj, path):
+    os.makedirs(os.path.dirname(path), exist_ok = True)
+    with data.atomic_write(path) as f:
+        pickle.dump(obj, f)
+
+
+def fit_kmeans(X, n_clusters = N_CLUSTERS, random_state = RANDOM_STATE):
+    # Scale data
+    sc = StandardScaler()
+    Z = sc.fit_transform(X)
+
+    km = KMeans(n_clusters = n_clusters, n_init = 'auto', random_state = random_state)
+    km.fit(Z)
+    return sc, km
+
+
+def get_kmeans(X, n_clusters = N_CLUSTERS, random_state = RANDOM_STATE):
+    # Load the fitted pair from disk if this exact model was fitted before, otherwise fit and persist it
+    features = list(X.columns)
+    path = model_path('kmeans', features, n_clusters, random_state, data_fingerprint(X))
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    sc, km = fit_kmeans(X, n_clusters, random_state)
+    save_pickle((sc, km), path)
+    return sc, km
+
+
+def _score_kmeans(task):
+    model_id, Z, n_clusters, random_state, sample_size = task
+    # One process per core, so keep each fit single-threaded
+    with threadpool_limits(limits = 1):
+        km = KMeans(n_clusters = n_clusters, n_init = 'auto', random_state = random_state)
+        km.fit(Z)
+        score = silhouette_score(Z, km.labels_, sample_size = min(sample_size, len(Z)), random_state = random_state)
+    return {
+        'model': model_id,
+        'k': n_clusters,
+        'seed': random_state,
+        'silhouette': float(score),
+        'inertia': float(km.inertia_),
+    }
+
+
+def select_k(model_ids = None, k_values = K_VALUES, seeds = SEEDS, sample_size = SILHOUETTE_SAMPLE_SIZE, workers = None):
+    # Sweeps k and seed for every model in one process pool and stores the best k (highest mean
+    # silhouette over seeds) and its best seed next to the cached models
+    df = data.load_combined2()
+    model_ids = list(model_ids or MODELS)
+    tasks = []
+    fingerprints = {}
+    for model_id in model_ids:
+        X = df[MODELS[model_id]]
+        fingerprints[model_id] = data_fingerprint(X)
+        Z = StandardScaler().fit_transform(X)
+        tasks += [(model_id, Z, k, seed, sample_size) for k in k_values for seed in seeds]
+
+    with ProcessPoolExecutor(max_workers = workers) as executor:
+        scores = pd.DataFrame(executor.map(_score_kmeans, tasks, chunksize = 4))
+
+    selections = {}
+    for model_id, model_scores in scores.groupby('model', sort = False):
+        mean_scores = model_scores.groupby('k')['silhouette'].mean()
+        best_k = int(mean_scores.idxmax())
+        best_seed = int(model_scores[model_scores['k'] == best_k].sort_values('silhouette').iloc[-1]['seed'])
+        selection = {
+            'model': model_id,
+            'features': MODELS[model_id],
+            'fingerprint': fingerprints[model_id],
+            'n_clusters': best_k,
+            'random_state': best_seed,
+            'sample_size': sample_size,
+            'scores': model_scores.drop(columns = 'model').to_dict('records'),
+        }
+        save_json(selection, selection_path(model_id, fingerprints[model_id]))
+        selections[model_id] = selection
+    return selections
+
+
+def model_params(model_id, X):
+    # k and seed chosen by select_k for this exact data, or the original defaults if it has not been run
+    path = selection_path(model_id, data_fingerprint(X))
+    if os.path.exists(path):
+        with open(path) as f:
+            selection = json.load(f)
+        return selection['n_clusters'], selection['random_state']
+    return N_CLUSTERS, RANDOM_STATE
+
+
+def neighbor_tree(Z):
+    return KDTree(Z)
+
+
+def graph_pairs(tree, Z, eps):
+    # Number of entries neighbor_graph would store, counted without building it
+    return int(tree.query_radius(Z, r = eps, count_only = True).sum())
+
+
+def neighbor_graph(tree, Z, eps):
+    # Sparse distance graph of every pair closer than eps, queried from a kd-tree fitted once per feature set
+    indices, distances = tree.query_radius(Z, r = eps, return_distance = True, sort_results = True)
+    indptr = np.concatenate([[0], np.cumsum([len(row) for row in indices])])
+    return sparse.csr_matrix((np.concatenate(distances), np.concatenate(indices), indptr), shape = (len(Z), len(Z)))
+
+
+def dbscan_graph(tree, Z, eps):
+    # (rows, graph): the graph of every row at eps (rows is None), or of a random sample of rows sized so
+    # that its graph is expected to hold about MAX_GRAPH_PAIRS pairs
+    pairs = graph_pairs(tree, Z, eps)
+    if pairs <= MAX_GRAPH_PAIRS:
+        return None, neighbor_graph(tree, Z, eps)
+    size = int(len(Z) * np.sqrt(MAX_GRAPH_PAIRS / pairs))
+    rows = np.sort(np.random.default_rng(RANDOM_STATE).choice(len(Z), size, replace = False))
+    return rows, neighbor_graph(neighbor_tree(Z[rows]), Z[rows], eps)
+
+
+def _fit_dbscan(Z, rows, graph, eps, min_samples):
+    # Labels of every row. On a sample, min_samples shrinks with the sample so the density threshold stays
+    # about the same, and each row left out takes the label of its nearest core sample within eps (as a
+    # border point would) or is noise.
+    if rows is None:
+        return DBSCAN(eps = eps, min_samples = min_samples, metric = 'precomputed').fit_predict(graph)
+    min_samples = max(2, round(min_samples * len(rows) / len(Z)))
+    model = DBSCAN(eps = eps, min_samples = min_samples, metric = 'precomputed').fit(graph)
+    labels = np.full(len(Z), -1, dtype = model.labels_.dtype)
+    labels[rows] = model.labels_
+    core = rows[model.core_sample_indices_]
+    rest = np.setdiff1d(np.arange(len(Z)), rows)
+    if len(core) and len(rest):
+        distance, nearest = neighbor_tree(Z[core]).query(Z[rest], k = 1)
+        labels[rest] = np.where(distance[:, 0] <= eps, labels[core][nearest[:, 0]], -1)
+    return labels
+
+
+def save_graph(rows, graph, directory):
+    # Stores a graph from dbscan_graph as plain .npy arrays, so the workers memory-map one copy from disk
+    # instead of each receiving its own
+    os.makedirs(directory)
+    arrays = {'data': graph.data, 'indices': graph.indices, 'indptr': graph.indptr}
+    if rows is not None:
+        arrays['rows'] = rows
+    for name, values in arrays.items():
+        np.save(os.path.join(directory, name + '.npy'), values)
+
+
+def open_graph(directory):
+    # (rows, graph) as passed to save_graph. Mapped copy-on-write, since DBSCAN may sort the graph in place.
+    arrays = {name: np.load(os.path.join(directory, name + '.npy'), mmap_mode = 'c') for name in ('data', 'indices', 'indptr')}
+    rows_path = os.path.join(directory, 'rows.npy')
+    rows = np.load(rows_path) if os.path.exists(rows_path) else None
+    size = len(arrays['indptr']) - 1
+    return rows, sparse.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']), shape = (size, size))
+
+
+_worker_inputs = {}
+
+
+def _init_dbscan_worker(Z):
+    _worker_inputs.clear()
+    _worker_inputs['Z'] = Z
+
+
+def _worker_graph(directory):
+    # The graph of the task's eps, kept open while the worker's next tasks are on the same eps
+    if _worker_inputs.get('directory') != directory:
+        _worker_inputs['directory'] = directory
+        _worker_inputs['graph'] = open_graph(directory)
+    return _worker_inputs['graph']
+
+
+def _score_dbscan(task):
+    model_id, eps, min_samples, sample_size, directory = task
+    Z = _worker_inputs['Z']
+    labels = _fit_dbscan(Z, *_worker_graph(directory), eps, min_samples)
+    clustered = labels >= 0
+    n_clusters = len(set(labels[clustered]))
+    score = float('nan')
+    # Drawn as silhouette_score(sample_size = ...) would, but checked first, since a sample of many counties
+    # can miss every member of a small cluster
+    rows = np.flatnonzero(clustered)
+    rows = rows[np.random.RandomState(RANDOM_STATE).permutation(len(rows))[:sample_size]]
+    if 2 <= len(set(labels[rows])) < len(rows):
+        score = float(silhouette_score(Z[rows], labels[rows]))
+    return {
+        'model': model_id,
+        'eps': eps,
+        'min_samples': min_samples,
+        'n_clusters': n_clusters,
+        'noise': float(1 - clustered.mean()),
+        'silhouette': score,
+    }
+
+
+def merged(eps_scores):
+    # Every min_samples leaves a single cluster and no noise; a larger eps can only merge clusters
+    return all(score['n_clusters'] == 1 and score['noise'] == 0 for score in eps_scores)
+
+
+def score_dbscan_grid(model_id, Z, eps_values, min_samples_values, sample_size, workers = None):
+    # Scores one model's grid in one pool (threads in this process when workers == 1). The graph of each eps,
+    # smallest first, is built once, stored on disk for the workers to memory-map and its (eps, min_samples)
+    # points are queued, so the next graph is built while the workers fit the last. No larger eps is queued
+    # once a finished one has merged, and the scores end at the first merged eps whatever finished first.
+    tree = neighbor_tree(Z)
+    futures = {}
+    executor_class = ThreadPoolExecutor if workers == 1 else ProcessPoolExecutor
+    os.makedirs(MODEL_DIR, exist_ok = True)
+    with TemporaryDirectory(dir = MODEL_DIR, prefix = 'dbscan-graphs-') as graphs:
+        with executor_class(max_workers = workers, initializer = _init_dbscan_worker, initargs = (Z,)) as executor:
+            for eps in sorted(eps_values):
+                if any(all(f.done() for f in queued) and merged([f.result() for f in queued])
+                       for queued in futures.values()):
+                    break
+                directory = os.path.join(graphs, f'eps-{eps:g}')
+                save_graph(*dbscan_graph(tree, Z, eps), directory)
+                futures[eps] = [executor.submit(_score_dbscan, (model_id, eps, min_samples, sample_size, directory))
+                                for min_samples in min_samples_values]
+            scores = []
+            for eps, queued in futures.items():
+                eps_scores = [f.result() for f in queued]
+                scores += eps_scores
+                if merged(eps_scores):
+                    for f in (f for later in futures.values() for f in later):
+                        f.cancel()
+                    break
+        # Worker threads leave the last graph mapped in this process
+        _worker_inputs.clear()
+    return pd.DataFrame(scores)
+
+
+def choose_dbscan(scores):
+    # Best silhouette among grid points with a usable number of clusters and little noise, otherwise
+    # the grid point that leaves the fewest counties unclustered
+    usable = scores[(scores['n_clusters'] >= 2) & (scores['n_clusters'] <= len(CLUSTER_COLORS))]
+    quiet = usable[usable['noise'] <= MAX_NOISE]
+    if quiet['silhouette'].notna().any():
+        return quiet.loc[quiet['silhouette'].idxmax()]
+    candidates = usable if len(usable) else scores[scores['n_clusters'] >= 1]
+    if len(candidates):
+        return candidates.sort_values(['noise', 'silhouette'], ascending = [True, False]).iloc[0]
+    return scores.sort_values('eps').iloc[-1]
+
+
+def select_dbscan(model_ids = None, eps_values = EPS_VALUES, min_samples_values = MIN_SAMPLES_VALUES,
+                  sample_size = SILHOUETTE_SAMPLE_SIZE, workers = None):
+    # Evaluates the eps/min_samples grid one model at a time, in a process pool unless workers == 1, and
+    # stores the chosen parameters and all scores next to the cached models
+    df = data.load_combined2()
+    selections = {}
+    for model_id in list(model_ids or MODELS):
+        X = df[MODELS[model_id]]
+        fingerprint = data_fingerprint(X)
+        model_scores = score_dbscan_grid(model_id, StandardScaler().fit_transform(X), eps_values,
+                                         min_samples_values, sample_size, workers)
+        best = choose_dbscan(model_scores)
+        selection = {
+            'model': model_id,
+            'features': MODELS[model_id],
+            'fingerprint': fingerprint,
+            'eps': float(best['eps']),
+            'min_samples': int(best['min_samples']),
+            'sample_size': sample_size,
+            'scores': model_scores.drop(columns = 'model').to_dict('records'),
+        }
+        save_json(selection, dbscan_selection_path(model_id, fingerprint))
+        selections[model_id] = selection
+    return selections
+
+
+def get_dbscan_params(X, model_id, workers = None):
+    # Parameters chosen for this exact data, running the grid search first if it has not been run
+    path = dbscan_selection_path(model_id, data_fingerprint(X))
+    if not os.path.exists(path):
+        select_dbscan([model_id], workers = workers)
+    with open(path) as f:
+        selection = json.load(f)
+    return selection['eps'], selection['min_samples']
+
+
+def assign_clusters(model_id, df):
+    features = MODELS[model_id]
+    sc, km = get_kmeans(df[features], *model_params(model_id, df[features]))
+    distances = km.transform(sc.transform(df[features]))
+
+    assignments = pd.DataFrame({
+        'fips': df['fips'].to_numpy(),
+        'model': model_id,
+        'method': 'kmeans',
+        'cluster': km.labels_.astype('int32'),
+    })
+    for i in range(km.n_clusters):
+        assignments[f'distance_{i}'] = distances[:, i].astype('float32')
+
+    centroids = pd.DataFrame(sc.inverse_transform(km.cluster_centers_), columns = features)
+    centroids.insert(0, 'cluster', range(km.n_clusters))
+    centroids.insert(0, 'method', 'kmeans')
+    centroids.insert(0, 'model', model_id)
+    return assignments, centroids
+
+
+def assign_dbscan_clusters(model_id, df, workers = None):
+    # DBSCAN has no centroids, so the cluster means (in data units) stand in for them; noise is labeled -1
+    features = MODELS[model_id]
+    X = df[features]
+    eps, min_samples = get_dbscan_params(X, model_id, workers)
+    Z = StandardScaler().fit_transform(X)
+    labels = _fit_dbscan(Z, *dbscan_graph(neighbor_tree(Z), Z, eps), eps, min_samples)
+
+    assignments = pd.DataFrame({
+        'fips': df['fips'].to_numpy(),
+        'model': model_id,
+        'method': 'dbscan',
+        'cluster': labels.astype('int32'),
+    })
+    centroids = X[labels >= 0].groupby(labels[labels >= 0]).mean()
+    centroids.insert(0, 'cluster', centroids.index)
+    centroids.insert(0, 'method', 'dbscan')
+    centroids.insert(0, 'model', model_id)
+    return assignments, centroids.reset_index(drop = True)
+
+
+def build_assignments(workers = None):
+    # Fits (or loads) every model once and writes the label, distance and centroid tables
+    df = data.load_combined2()
+    results = [assign_clusters(model_id, df) for model_id in MODELS]
+    results += [assign_dbscan_clusters(model_id, df, workers) for model_id in MODELS]
+    assignments = pd.concat([assignments for assignments, _ in results], ignore_index = True)
+    centroids = pd.concat([centroids for _, centroids in results], ignore_index = True)
+    assignments['model'] = assignments['model'].astype('category')
+    assignments['method'] = assignments['method'].astype('category')
+
+    os.makedirs(data.BUILD_DIR, exist_ok = True)
+    # Centroids first, so a reader that sees the new assignments also sees matching centroids
+    for table, path in [(centroids, CENTROIDS_PATH), (assignments, ASSIGNMENTS_PATH)]:
+        data.write_parquet(table, path)
+    save_json({'fingerprint': data_fingerprint(df), 'counties': len(df)}, ASSIGNMENTS_SOURCE_PATH)
+    return assignments, centroids
+
+
+@st.cache_resource(max_entries = 1, show_spinner = False)
+def _load_assignments(path, version):
+    assignments = pd.read_parquet(path)
+    centroids = pd.read_parquet(CENTROIDS_PATH)
+    by_model = {}
+    for model_id in MODELS:
+        for method in METHODS.values():
+            model_assignments = assignments[(assignments['model'] == model_id) & (assignments['method'] == method)]
+            model_centroids = centroids[(centroids['model'] == model_id) & (centroids['method'] == method)]
+            by_model[model_id, method] = (
+                model_assignments.set_index('fips').dropna(axis = 1, how = 'all'),
+                model_centroids.set_index('cluster')[MODELS[model_id]],
+            )
+    return by_model
+
+
+@st.cache_resource(max_entries = 1, show_spinner = False)
+def combined2_fingerprint(path, version):
+    return data_fingerprint(data.load_combined2())
+
+
+@st.cache_resource(max_entries = 1, show_spinner = False)
+def _assignments_source(path, version):
+    with open(path) as f:
+        return json.load(f)['fingerprint']
+
+
+def load_assignments():
+    # Written only by `python build_data.py clusters`; never fitted during a rerun. Tables built from other
+    # combined2 data than the app reads now (a county added or values changed) raise data.StaleBuildError.
+    hint = "run `python build_data.py clusters`"
+    if not os.path.exists(ASSIGNMENTS_PATH) or not os.path.exists(ASSIGNMENTS_SOURCE_PATH):
+        raise FileNotFoundError(f"no cluster assignments in {data.BUILD_DIR}, {hint}")
+    built_from = _assignments_source(ASSIGNMENTS_SOURCE_PATH, data.file_version(ASSIGNMENTS_SOURCE_PATH))
+    if built_from != combined2_fingerprint(*data.source_version('combined2')):
+        raise data.StaleBuildError(f"the cluster assignments were built from other county data, {hint}")
+    return _load_assignments(ASSIGNMENTS_PATH, data.file_version(ASSIGNMENTS_PATH))
+
+
+def cluster_labels(model_id, fips, method = 'kmeans'):
+    # Labels for the given FIPS codes, in the same order; counties missing from the table count as noise
+    return load_assignments()[model_id, method][0]['cluster'].reindex(fips, fill_value = -1).to_numpy()
+
+
+def cluster_centroids(model_id, method = 'kmeans'):
+    return load_assignments()[model_id, method][1]
+
+
+def county_cluster(model_id, fips, method = 'kmeans'):
+    return int(load_assignments()[model_id, method][0]['cluster'].get(fips, -1))
+
+
+def cluster_color(label):
+    if label < 0:
+        return NOISE_COLOR
+    return CLUSTER_COLORS[label % len(CLUSTER_COLORS)]
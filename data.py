@@ -0,0 +1,240 @@
+import os
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+
+# Data files live outside of the app directory, relative to where streamlit is launched; WATER_USAGE_DATA_DIR
+# points the app at another copy, such as the synthetic files written by synthetic.py
+DATA_DIR = os.environ.get('WATER_USAGE_DATA_DIR', '../../data')
+CLEAN_DATA_DIR = os.path.join(DATA_DIR, 'clean-data')
+RAW_DATA_DIR = os.path.join(DATA_DIR, 'raw-data')
+# Typed columnar copies of the sources written by build_data.py
+BUILD_DIR = os.path.join(DATA_DIR, 'build')
+# Bumped whenever normalization adds or changes columns, so files built by older code are ignored
+FORMAT_VERSION = 2
+
+COMBINED_PATH = os.path.join(CLEAN_DATA_DIR, 'combined.csv')
+COMBINED2_PATH = os.path.join(CLEAN_DATA_DIR, 'combined2.csv')
+DATA_DICT_PATH = os.path.join(CLEAN_DATA_DIR, 'data_dict.csv')
+MONTHLY_PATH = os.path.join(CLEAN_DATA_DIR, 'Monthly_Temp_Drought_Combo.csv')
+YEARLY_PATH = os.path.join(CLEAN_DATA_DIR, 'Temp_Drought_Combo.csv')
+COUNTIES_PATH = os.path.join(RAW_DATA_DIR, 'counties.csv')
+
+
+def file_version(path):
+    # Modification time doubles as the cache key, so an edited file is re-read on the next rerun
+    return os.stat(path).st_mtime_ns
+
+
+@contextmanager
+def atomic_write(path, mode = 'wb'):
+    # Writes to a temporary file first and moves it into place once complete, so a running app never reads
+    # a half-written file
+    with open(path + '.tmp', mode) as f:
+        yield f
+    os.replace(path + '.tmp', path)
+
+
+def write_parquet(df, path):
+    with atomic_write(path) as f:
+        df.to_parquet(f, index = False)
+
+
+class StaleBuildError(FileNotFoundError):
+    # A file written by build_data.py from other data than the app reads now. Handled like a missing file,
+    # with the same hint to rerun its build step.
+    pass
+
+
+def pad_fips(fips):
+    #cite :https://stackoverflow.com/a/339024 for rjust
+    return fips.astype(str).str.rjust(5, '0')
+
+
+# Normalization steps, shared by every loader so that all pages see the same frames
+
+def normalize_combined(df):
+    df['fips'] = pad_fips(df['fips'])
+    return df
+
+
+def normalize_monthly(mon):
+    mon = mon.drop(columns = 'Unnamed: 0')
+    mon = mon.rename(columns = {
+        'Month' : 'month',
+        'FIPS' : 'fips',
+        'Tmin_C' : 'min_temp',
+        'Tmax_C' : 'max_temp',
+        'Tmean_C' : 'mean_temp',
+        'Flag_T' : 'flag_pop_covered'
+        })
+    mon['month'] = pd.to_datetime(mon['month'], format = ('%Y-%m'))
+    mon['fips'] = pad_fips(mon['fips'])
+    # Convert Celsius to Farenheit to limit confusion within the U.S. Market
+    mon[['min_temp','max_temp','mean_temp']] *= (9/5)
+    mon[['min_temp','max_temp','mean_temp']] += 32
+    # Drought categories are sequential, so the share at a level "or worse" is the running max from the
+    # most severe category down (fmax skips missing values like DataFrame.max did)
+    drought = mon[['exceptional_drought','extreme_drought','severe_drought','moderate_drought']].to_numpy()
+    cumulative = np.fmax.accumulate(drought, axis = 1)
+    mon['extreme_plus'] = cumulative[:, 1]
+    mon['severe_plus'] = cumulative[:, 2]
+    mon['moderate_plus'] = cumulative[:, 3]
+    return mon
+
+
+def normalize_yearly(year):
+    year = year.drop(columns = 'Unnamed: 0')
+    year['year'] = pd.to_datetime(year['year'].astype(str))
+    year['FIPS'] = pad_fips(year['FIPS'])
+    # Convert to Fahrenheit
+    year['Tmean_F'] = year['Tmean_C'] * (9/5) + 32
+    return year
+
+
+def normalize_counties(counties):
+    counties = counties.drop(columns = 'Unnamed: 0')
+    counties['FIPS'] = pad_fips(counties['FIPS'])
+    return counties
+
+
+# Source files that build_data.py converts to parquet: (csv path, read_csv dtypes, normalization)
+SOURCES = {
+    'combined': (COMBINED_PATH, {'fips': str}, normalize_combined),
+    'combined2': (COMBINED2_PATH, {'fips': str}, normalize_combined),
+    'monthly': (MONTHLY_PATH, {'FIPS': str}, normalize_monthly),
+    'yearly': (YEARLY_PATH, {'FIPS': str}, normalize_yearly),
+    'counties': (COUNTIES_PATH, {'FIPS': str}, normalize_counties),
+}
+
+
+def parquet_path(name):
+    return os.path.join(BUILD_DIR, f'{name}.v{FORMAT_VERSION}.parquet')
+
+
+def read_source(name):
+    csv_path, dtype, normalize = SOURCES[name]
+    return normalize(pd.read_csv(csv_path, dtype = dtype))
+
+
+def source_path(name):
+    # Prefer the parquet copy unless the csv has been edited since the last build
+    csv_path = SOURCES[name][0]
+    pq_path = parquet_path(name)
+    if os.path.exists(pq_path):
+        if not os.path.exists(csv_path) or file_version(pq_path) >= file_version(csv_path):
+            return pq_path
+    return csv_path
+
+
+def _read(name, path):
+    if path.endswith('.parquet'):
+        # Already normalized at build time
+        return pd.read_parquet(path)
+    return read_source(name)
+
+
+# Cached loaders. st.cache_resource keeps one copy per process that is shared by every
+# session and page; the file version is part of the key and max_entries=1 drops stale copies.
+# The frames are shared, so callers must not modify them in place.
+
+@st.cache_resource(max_entries = 1, show_spinner = False)
+def _load_combined(path, version):
+    return _read('combined', path)
+
+
+@st.cache_resource(max_entries = 1, show_spinner = False)
+def _load_combined2(path, version):
+    return _read('combined2', path)
+
+
+@st.cache_resource(max_entries = 1, show_spinner = False)
+def _load_data_dict(path, version):
+    return pd.read_csv(path)
+
+
+@st.cache_resource(max_entries = 1, show_spinner = False)
+def _load_monthly(path, version):
+    return _read('monthly', path)
+
+
+@st.cache_resource(max_entries = 1, show_spinner = False)
+def _load_yearly(path, version):
+    return _read('yearly', path)
+
+
+@st.cache_resource(max_entries = 1, show_spinner = False)
+def _load_counties(path, version):
+    return _read('counties', path)
+
+
+def source_version(name):
+    path = source_path(name)
+    return path, file_version(path)
+
+
+def load_combined():
+    return _load_combined(*source_version('combined'))
+
+
+def load_combined2():
+    return _load_combined2(*source_version('combined2'))
+
+
+def load_data_dict():
+    return _load_data_dict(DATA_DICT_PATH, file_version(DATA_DICT_PATH))
+
+
+def load_monthly():
+    return _load_monthly(*source_version('monthly'))
+
+
+def load_yearly():
+    return _load_yearly(*source_version('yearly'))
+
+
+def load_counties():
+    return _load_counties(*source_version('counties'))
+
+
+class CountyIndex:
+    # O(1) lookups of a county's combined2 summary record by FIPS or by (state, countyname),
+    # plus the sorted state -> county options used by the sidebar selectors
+
+    def __init__(self, df):
+        self.records = {}
+        self.fips_by_name = {}
+        for record in df.to_dict('records'):
+            fips = record['fips']
+            self.records[fips] = record
+            self.fips_by_name.setdefault((record['state'], record['countyname']), fips)
+
+        counties_by_state = {}
+        for state, countyname in self.fips_by_name:
+            counties_by_state.setdefault(state, []).append(countyname)
+        self.states = tuple(sorted(counties_by_state))
+        self.counties_by_state = {state: tuple(sorted(counties_by_state[state])) for state in self.states}
+
+    def __contains__(self, fips):
+        return fips in self.records
+
+    def fips(self, state, countyname):
+        return self.fips_by_name[(state, countyname)]
+
+    def record(self, fips):
+        return self.records[fips]
+
+    def lookup(self, state, countyname):
+        return self.records[self.fips(state, countyname)]
+
+
+@st.cache_resource(max_entries = 1, show_spinner = False)
+def _load_county_index(path, version):
+    return CountyIndex(_load_combined2(path, version))
+
+
+def load_county_index():
+    return _load_county_index(*source_version('combined2'))
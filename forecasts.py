@@ -0,0 +1,130 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scipy.stats import norm
+from threadpoolctl import threadpool_limits
+
+import data
+import timeseries
+import trends
+
+
+# Point forecasts and prediction intervals for the months after the data ends, one row per (county,
+# measure, month). Written by `python build_data.py forecasts`.
+FORECASTS_PATH = os.path.join(data.BUILD_DIR, f'forecasts.v{data.FORMAT_VERSION}.parquet')
+
+# Measures, as on the National Trends page
+METRICS = trends.METRICS
+FORECAST_MONTHS = 24
+# A measure is only forecast for a county with at least this many observed months
+MIN_MONTHS = 24
+# Central coverage of the two stored intervals
+INTERVALS = (0.8, 0.95)
+# Percent-of-population measures cannot leave this range
+BOUNDS = {column: (0.0, 100.0) for column in METRICS if column != 'mean_temp'}
+
+
+def fit_seasonal(months, y):
+    # Linear trend plus a mean for every calendar month, with AR(1) residuals: returns the coefficients,
+    # the residual autocorrelation, the innovation standard deviation and the last residual
+    present = ~np.isnan(y)
+    months, y = months[present], y[present]
+    X = np.zeros((len(y), 13))
+    X[:, 0] = months - months[-1]
+    X[np.arange(len(y)), 1 + months % 12] = 1
+    coef = np.linalg.lstsq(X, y, rcond = None)[0]
+    residuals = y - X @ coef
+    phi = 0.0
+    if len(residuals) > 2 and residuals[:-1].std() > 0:
+        phi = float(np.clip(np.corrcoef(residuals[:-1], residuals[1:])[0, 1], 0.0, 0.99))
+    sigma = float(np.std(residuals[1:] - phi * residuals[:-1]))
+    return coef, phi, sigma, residuals[-1], months[-1]
+
+
+def forecast_seasonal(fit, horizon = FORECAST_MONTHS):
+    # (months, point forecast, standard error) for the next `horizon` months
+    coef, phi, sigma, last_residual, last_month = fit
+    h = np.arange(1, horizon + 1)
+    months = last_month + h
+    point = coef[0] * h + coef[1 + months % 12] + phi ** h * last_residual
+    # Variance of an AR(1) forecast h steps ahead
+    se = sigma * np.sqrt(np.cumsum(phi ** (2 * (h - 1))))
+    return months, point, se
+
+
+def forecast_counties(fips_batch):
+    # Fits and forecasts every measure of a batch of counties; run in the worker processes
+    store = timeseries.load_store('monthly')
+    frames = []
+    with threadpool_limits(limits = 1):
+        for county_fips in fips_batch:
+            df = store.county(county_fips, columns = list(METRICS))
+            if df.empty:
+                continue
+            months = df.index.to_numpy().astype('datetime64[M]').astype(np.int64)
+            for column in METRICS:
+                if df[column].notna().sum() < MIN_MONTHS:
+                    continue
+                future, point, se = forecast_seasonal(fit_seasonal(months, df[column].to_numpy(dtype = float)))
+                frame = {'fips': county_fips, 'metric': column,
+                         'month': future.astype('datetime64[M]').astype('datetime64[ns]'), 'forecast': point}
+                for coverage in INTERVALS:
+                    z = norm.ppf(0.5 + coverage / 2)
+                    frame[f'lower_{coverage * 100:.0f}'] = point - z * se
+                    frame[f'upper_{coverage * 100:.0f}'] = point + z * se
+                frame = pd.DataFrame(frame)
+                if column in BOUNDS:
+                    frame.iloc[:, 3:] = frame.iloc[:, 3:].clip(*BOUNDS[column])
+                frames.append(frame)
+    return pd.concat(frames, ignore_index = True) if frames else None
+
+
+def build_forecasts(workers = None, batch_size = 100):
+    fips = list(timeseries.load_store('monthly').offsets)
+    batches = [fips[i:i + batch_size] for i in range(0, len(fips), batch_size)]
+    # In this process when workers == 1
+    executor_class = ThreadPoolExecutor if workers == 1 else ProcessPoolExecutor
+    with executor_class(max_workers = workers) as executor:
+        frames = [frame for frame in executor.map(forecast_counties, batches) if frame is not None]
+    if not frames:
+        raise ValueError(f"no county in the monthly data has {MIN_MONTHS} observed months of any measure to "
+                         "forecast from")
+    forecasts = pd.concat(frames, ignore_index = True)
+
+    # Compact on disk: categorical keys and float32 values
+    forecasts['fips'] = forecasts['fips'].astype('category')
+    forecasts['metric'] = forecasts['metric'].astype('category')
+    value_columns = forecasts.columns[3:]
+    forecasts[value_columns] = forecasts[value_columns].astype(np.float32)
+    os.makedirs(data.BUILD_DIR, exist_ok = True)
+    data.write_parquet(forecasts, FORECASTS_PATH)
+    return forecasts
+
+
+@st.cache_resource(max_entries = 1, show_spinner = False)
+def _load_forecasts(path, version):
+    forecasts = pd.read_parquet(path)
+    # Row positions of every (county, measure), so a chart's lookup is a dict hit and one take
+    positions = forecasts.groupby(['fips', 'metric'], observed = True).indices
+    return forecasts.drop(columns = ['fips', 'metric']).set_index('month'), positions
+
+
+def load_forecasts():
+    # (forecast values indexed by month, (fips, metric) -> row positions). Written only by `python build_data.py forecasts`; never fitted during a rerun
+    if not os.path.exists(FORECASTS_PATH):
+        raise FileNotFoundError(f"no forecasts in {data.BUILD_DIR}, run `python build_data.py forecasts`")
+    return _load_forecasts(FORECASTS_PATH, data.file_version(FORECASTS_PATH))
+
+
+def forecasts_version():
+    # (name, version) for the cache keys of charts that draw the forecasts
+    return ('forecasts', data.file_version(FORECASTS_PATH))
+
+
+def county_forecast(county_fips, metric):
+    # The stored forecast of one measure for one county, indexed by month; empty if there is none
+    forecasts, positions = load_forecasts()
+    return forecasts.take(positions.get((county_fips, metric), []))
@@ -0,0 +1,355 @@
+import gzip
+import json
+import os
+from urllib.request import urlopen
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scipy import sparse
+
+import data
+
+
+#cite: https://plotly.com/python/county-choropleth/
+SOURCE_URL = 'https://raw.githubusercontent.com/plotly/datasets/master/geojson-counties-fips.json'
+
+# Local copy of the plotly county geometry plus simplified versions written by `python build_data.py geojson`
+GEO_DIR = os.path.join(data.DATA_DIR, 'geo')
+SOURCE_PATH = os.path.join(GEO_DIR, 'geojson-counties-fips.json')
+
+# Simplification levels: (Douglas-Peucker tolerance in degrees, decimals kept in the coordinates)
+LEVELS = {
+    'full': None,
+    'high': (0.001, 5),
+    'medium': (0.005, 4),
+    'low': (0.02, 3),
+}
+DEFAULT_LEVEL = 'medium'
+
+# County adjacency graph derived from the geometry: counties sharing at least one boundary vertex (after
+# rounding to ADJACENCY_DECIMALS) are neighbors. Stored in CSR form, written by `python build_data.py adjacency`.
+ADJACENCY_PATH = os.path.join(data.BUILD_DIR, f'adjacency.v{data.FORMAT_VERSION}.npz')
+ADJACENCY_DECIMALS = 4
+
+# The low level, gzipped and committed with the app, read when GEO_DIR holds no geometry (a machine without
+# network access that never ran the geojson step). Written by `python build_data.py geojson --bundle`.
+BUNDLED_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'counties-low.json.gz')
+
+
+def level_path(level):
+    if LEVELS[level] is None:
+        return SOURCE_PATH
+    return os.path.join(GEO_DIR, f'counties-{level}.json')
+
+
+def fetch_source(url = SOURCE_URL, path = SOURCE_PATH):
+    # One-time download, only needed on a machine with network access
+    os.makedirs(os.path.dirname(path), exist_ok = True)
+    with urlopen(url) as response:
+        payload = response.read()
+    with data.atomic_write(path) as f:
+        f.write(payload)
+
+
+def boundary_rings(geojson):
+    # (FIPS, ring coordinates) of every ring of every polygon, in file order
+    for feature in geojson['features']:
+        geometry = feature['geometry']
+        if geometry['type'] not in ('Polygon', 'MultiPolygon'):
+            continue
+        polygons = [geometry['coordinates']] if geometry['type'] == 'Polygon' else geometry['coordinates']
+        for polygon in polygons:
+            for ring in polygon:
+                yield feature['id'], np.asarray(ring, dtype = float)
+
+
+def junctions(geojson, decimals = ADJACENCY_DECIMALS):
+    # Per ring, in boundary_rings order: the vertices where the set of counties whose boundaries pass through
+    # the vertex changes before or after it. Between two junctions a ring follows one border (or coastline),
+    # which the county on the other side follows vertex for vertex in reverse.
+    rings = list(boundary_rings(geojson))
+    if not rings:
+        return []
+    lengths = [len(points) for _, points in rings]
+    points = np.concatenate([points for _, points in rings])
+    vertices = pd.DataFrame({
+        'x': np.round(points[:, 0], decimals),
+        'y': np.round(points[:, 1], decimals),
+        'fips': np.repeat(np.array([fips for fips, _ in rings], dtype = object), lengths),
+    })
+    vertex = vertices.groupby(['x', 'y'], sort = False).ngroup().to_numpy()
+    owners = (pd.DataFrame({'vertex': vertex, 'fips': vertices['fips']}).drop_duplicates()
+              .sort_values(['vertex', 'fips']).groupby('vertex')['fips'].agg(tuple))
+    signature = pd.factorize(owners)[0][vertex]
+
+    fixed = []
+    for ring in np.split(signature, np.cumsum(lengths)[:-1]):
+        # The last vertex repeats the first
+        open_ring = ring[:-1]
+        changes = (open_ring != np.roll(open_ring, 1)) | (open_ring != np.roll(open_ring, -1))
+        fixed.append(np.append(changes, changes[:1]))
+    return fixed
+
+
+def simplify_line(points, tolerance):
+    # Iterative Douglas-Peucker over an open line; returns the mask of vertices kept
+    keep = np.zeros(len(points), dtype = bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end <= start + 1:
+            continue
+        segment = points[end] - points[start]
+        offsets = points[start + 1:end] - points[start]
+        length = np.hypot(segment[0], segment[1])
+        if length == 0:
+            # The line returns to where it started: measure from that point
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            distances = np.abs(segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0]) / length
+        i = int(np.argmax(distances))
+        if distances[i] > tolerance:
+            mid = start + 1 + i
+            keep[mid] = True
+            stack.append((start, mid))
+            stack.append((mid, end))
+    return keep
+
+
+def simplify_ring(ring, tolerance, fixed = None):
+    # Keeps the fixed vertices (see junctions) and simplifies each stretch between two of them on its own,
+    # always from its lexicographically smaller end, so a border shared by two rings comes out as the same line
+    # in both and leaves no slivers. A ring without two fixed vertices is anchored at its smallest vertex and
+    # the vertex farthest from it. Rings that would collapse below a triangle are kept as they are.
+    points = np.asarray(ring, dtype = float)
+    if len(points) <= 4:
+        return points
+    n = len(points) - 1
+    anchors = np.zeros(n, dtype = bool) if fixed is None else np.asarray(fixed[:n], dtype = bool).copy()
+    if not anchors.any():
+        anchors[np.lexsort((points[:n, 1], points[:n, 0]))[0]] = True
+    if anchors.sum() == 1:
+        offsets = points[:n] - points[np.argmax(anchors)]
+        anchors[np.argmax(np.hypot(offsets[:, 0], offsets[:, 1]))] = True
+
+    # Start the ring at its first anchor so every stretch is a plain slice
+    first = np.argmax(anchors)
+    rotated = np.roll(points[:n], -first, axis = 0)
+    closed = np.vstack([rotated, rotated[:1]])
+    bounds = np.append(np.flatnonzero(np.roll(anchors, -first)), n)
+    keep = np.zeros(n + 1, dtype = bool)
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        stretch = closed[start:end + 1]
+        backwards = tuple(stretch[-1]) < tuple(stretch[0])
+        kept = simplify_line(stretch[::-1] if backwards else stretch, tolerance)
+        keep[start:end + 1] |= kept[::-1] if backwards else kept
+    simplified = closed[keep]
+    if len(simplified) < 4:
+        return points
+    return simplified
+
+
+def simplify_polygon(rings, tolerance, decimals, fixed = None):
+    fixed = fixed or [None] * len(rings)
+    return [np.round(simplify_ring(ring, tolerance, mask), decimals).tolist() for ring, mask in zip(rings, fixed)]
+
+
+def simplify_geojson(geojson, tolerance, decimals, fixed = None):
+    # fixed: junctions(geojson), when it is already computed
+    fixed = iter(junctions(geojson) if fixed is None else fixed)
+    features = []
+    for feature in geojson['features']:
+        geometry = feature['geometry']
+        if geometry['type'] == 'Polygon':
+            coordinates = simplify_polygon(geometry['coordinates'], tolerance, decimals,
+                                           [next(fixed) for _ in geometry['coordinates']])
+        elif geometry['type'] == 'MultiPolygon':
+            coordinates = [simplify_polygon(polygon, tolerance, decimals, [next(fixed) for _ in polygon])
+                           for polygon in geometry['coordinates']]
+        else:
+            coordinates = geometry['coordinates']
+        features.append({
+            'type': 'Feature',
+            'id': feature['id'],
+            'properties': feature.get('properties', {}),
+            'geometry': {'type': geometry['type'], 'coordinates': coordinates},
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def build_levels(source_path = SOURCE_PATH, bundle = False):
+    # Writes every simplified level, and with bundle the low one to BUNDLED_PATH as well
+    geojson = read_geojson(source_path)
+    fixed = junctions(geojson)
+    paths = []
+    for level, settings in LEVELS.items():
+        if settings is None:
+            continue
+        path = level_path(level)
+        simplified = json.dumps(simplify_geojson(geojson, *settings, fixed), separators = (',', ':'))
+        with data.atomic_write(path, 'w') as f:
+            f.write(simplified)
+        paths.append(path)
+        if bundle and level == 'low':
+            os.makedirs(os.path.dirname(BUNDLED_PATH), exist_ok = True)
+            with data.atomic_write(BUNDLED_PATH) as f:
+                # No timestamp in the header, so rebuilding from the same source leaves the committed file unchanged
+                f.write(gzip.compress(simplified.encode(), mtime = 0))
+            paths.append(BUNDLED_PATH)
+    return paths
+
+
+def read_geojson(path):
+    with (gzip.open(path, 'rt') if path.endswith('.gz') else open(path)) as f:
+        return json.load(f)
+
+
+@st.cache_resource(max_entries = len(LEVELS) + 1, show_spinner = False)
+def _load_geojson(path, version):
+    return read_geojson(path)
+
+
+def load_counties_geojson(level = DEFAULT_LEVEL):
+    # Parsed once per process and level, then shared by every session; never touches the network. Falls back
+    # to the bundled low level when the level has not been built here.
+    path = level_path(level)
+    if not os.path.exists(path) and os.path.exists(BUNDLED_PATH):
+        path = BUNDLED_PATH
+    return _load_geojson(path, data.file_version(path))
+
+
+def geometry_path():
+    # Shared boundaries only line up exactly in the unsimplified geometry, so prefer it over the levels, with
+    # the bundled low level as the last resort
+    for level in ('full', 'high', DEFAULT_LEVEL):
+        if os.path.exists(level_path(level)):
+            return level_path(level)
+    if os.path.exists(BUNDLED_PATH):
+        return BUNDLED_PATH
+    raise FileNotFoundError(f"no county geometry in {GEO_DIR}, run `python build_data.py geojson`")
+
+
+class Adjacency:
+    # CSR adjacency: the neighbors of fips[i] are fips[indices[indptr[i]:indptr[i + 1]]]
+
+    def __init__(self, fips, indptr, indices):
+        self.fips = np.asarray(fips)
+        self.indptr = np.asarray(indptr)
+        self.indices = np.asarray(indices)
+        self.rows = {code: i for i, code in enumerate(self.fips.tolist())}
+        self.matrix = sparse.csr_matrix((np.ones(len(self.indices), dtype = np.float32), self.indices, self.indptr),
+                                        shape = (len(self.fips), len(self.fips)))
+
+    @classmethod
+    def from_geojson(cls, geojson, decimals = ADJACENCY_DECIMALS):
+        # Every boundary vertex tagged with its county, deduplicated, then joined on the vertex to find the
+        # pairs of counties that share one
+        owners, xs, ys = [], [], []
+        for fips, points in boundary_rings(geojson):
+            owners.append(np.full(len(points), fips, dtype = object))
+            xs.append(points[:, 0])
+            ys.append(points[:, 1])
+        vertices = pd.DataFrame({
+            'x': np.round(np.concatenate(xs), decimals),
+            'y': np.round(np.concatenate(ys), decimals),
+            'fips': np.concatenate(owners),
+        }).drop_duplicates()
+        pairs = vertices.merge(vertices, on = ['x', 'y'])
+        pairs = pairs.loc[pairs['fips_x'] != pairs['fips_y'], ['fips_x', 'fips_y']].drop_duplicates()
+
+        fips = np.array(sorted(feature['id'] for feature in geojson['features']))
+        source = np.searchsorted(fips, pairs['fips_x'].to_numpy().astype(str))
+        target = np.searchsorted(fips, pairs['fips_y'].to_numpy().astype(str))
+        order = np.lexsort((target, source))
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(source, minlength = len(fips)))])
+        return cls(fips, indptr.astype(np.int32), target[order].astype(np.int32))
+
+    @classmethod
+    def open(cls, path):
+        arrays = np.load(path)
+        return cls(arrays['fips'], arrays['indptr'], arrays['indices'])
+
+    def write(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+        with data.atomic_write(path) as f:
+            np.savez(f, fips = self.fips, indptr = self.indptr, indices = self.indices)
+
+    def __contains__(self, fips):
+        return fips in self.rows
+
+    def neighbors(self, fips):
+        i = self.rows[fips]
+        return self.fips[self.indices[self.indptr[i]:self.indptr[i + 1]]].tolist()
+
+    def within(self, fips, hops):
+        # FIPS -> hop count for every county reachable in at most `hops` steps, the county itself excluded
+        seen = {self.rows[fips]: 0}
+        frontier = [self.rows[fips]]
+        for hop in range(1, hops + 1):
+            next_frontier = []
+            for i in frontier:
+                for j in self.indices[self.indptr[i]:self.indptr[i + 1]].tolist():
+                    if j not in seen:
+                        seen[j] = hop
+                        next_frontier.append(j)
+            frontier = next_frontier
+        return {self.fips[i]: hop for i, hop in seen.items() if hop > 0}
+
+    def smooth(self, values, hops = 1):
+        # Mean of each county's value and those of every county within `hops` steps, for a Series indexed by
+        # FIPS. Missing values and counties without geometry are left out of the means.
+        v = values.reindex(self.fips).to_numpy(dtype = float)
+        present = ~np.isnan(v)
+        reach = sparse.identity(len(self.fips), format = 'csr', dtype = np.float32)
+        step = reach + self.matrix
+        for _ in range(hops):
+            reach = (reach @ step).astype(bool).astype(np.float32)
+        totals = reach @ np.where(present, v, 0.0)
+        counts = reach @ present.astype(float)
+        with np.errstate(invalid = 'ignore', divide = 'ignore'):
+            smoothed = pd.Series(totals / counts, index = self.fips)
+        return smoothed.reindex(values.index)
+
+
+def build_adjacency(path = None):
+    adjacency = Adjacency.from_geojson(read_geojson(path or geometry_path()))
+    adjacency.write(ADJACENCY_PATH)
+    return adjacency
+
+
+@st.cache_resource(max_entries = 1, show_spinner = False)
+def _load_adjacency(path, version):
+    return Adjacency.open(path)
+
+
+def load_adjacency():
+    # Written only by `python build_data.py adjacency`; never derived during a rerun. A graph older than the
+    # geometry it is derived from raises data.StaleBuildError.
+    hint = "run `python build_data.py adjacency`"
+    if not os.path.exists(ADJACENCY_PATH):
+        raise FileNotFoundError(f"no county adjacency in {data.BUILD_DIR}, {hint}")
+    version = data.file_version(ADJACENCY_PATH)
+    if version < data.file_version(geometry_path()):
+        raise data.StaleBuildError(f"the county adjacency is older than the geometry, {hint}")
+    return _load_adjacency(ADJACENCY_PATH, version)
+
+
+def neighbor_comparison(county_fips, hops, columns):
+    # (the county's combined2 values next to its neighbors' mean and its spatially smoothed values, the
+    # neighbors' records with how many counties away they are), or None when no neighbor is in the data
+    adjacency = load_adjacency()
+    county_index = data.load_county_index()
+    within = adjacency.within(county_fips, hops)
+    nearby = pd.DataFrame([county_index.record(code) for code in within if code in county_index])
+    if nearby.empty:
+        return None
+    nearby['counties away'] = nearby['fips'].map(within)
+    values = data.load_combined2().set_index('fips')[columns]
+    summary = pd.DataFrame({
+        'county': values.loc[county_fips],
+        'neighbors': nearby[columns].mean(),
+        'smoothed': [adjacency.smooth(values[c], hops).loc[county_fips] for c in columns],
+    })
+    return summary, nearby.sort_values('counties away')
@@ -0,0 +1,130 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+
+# Finished page results (figures, chart images, tables), kept in a bounded LRU shared by every session and keyed
+# by the widget state and data versions they were built from, so a selection any user has made before is served
+# from memory. Entries older than RESULT_CACHE_TTL seconds are built again (None keeps them until evicted).
+RESULT_CACHE_MAX_BYTES = 128 * 1024 * 1024
+RESULT_CACHE_TTL = 6 * 60 * 60
+
+# Returned by get() on a miss inside get_or_compute, since None is a valid result to cache
+_MISSING = object()
+
+
+def entry_size(value):
+    # Bytes an entry is charged against the memory budget
+    if isinstance(value, (bytes, str)):
+        return len(value)
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index = True, deep = True).sum())
+    if isinstance(value, go.Figure):
+        return len(value.to_json())
+    if isinstance(value, tuple):
+        return sum(entry_size(v) for v in value)
+    return len(pickle.dumps(value))
+
+
+def widget_key(page, widgets, *versions):
+    # The page, the value of every widget the result depends on (multiselects as tuples) and the
+    # (name, version) of every data file it was built from
+    state = tuple(sorted((name, tuple(value) if isinstance(value, list) else value) for name, value in widgets.items()))
+    return (page,) + state + tuple(versions)
+
+
+class ResultCache:
+
+    def __init__(self, max_bytes = RESULT_CACHE_MAX_BYTES, ttl = RESULT_CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # key -> (value, size in bytes, time stored), least recently used first
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.lock = threading.Lock()
+
+    def expired(self, stored, now):
+        return self.ttl is not None and now - stored > self.ttl
+
+    def drop(self, key):
+        self.bytes -= self.entries.pop(key)[1]
+
+    def get(self, key, default = None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if not self.expired(entry[2], time.monotonic()):
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                self.drop(key)
+                self.expirations += 1
+        return self.miss(key, default)
+
+    def miss(self, key, default = None):
+        # Called when the key is not in memory; subclasses can fall back to slower storage here
+        with self.lock:
+            self.misses += 1
+        return default
+
+    def put(self, key, value):
+        size = entry_size(value)
+        now = time.monotonic()
+        evicted = []
+        with self.lock:
+            if key in self.entries:
+                self.drop(key)
+            self.entries[key] = (value, size, now)
+            self.bytes += size
+            if self.bytes > self.max_bytes:
+                # Expired entries make room first, then the least recently used ones
+                for old_key in [k for k, (_, _, stored) in self.entries.items() if self.expired(stored, now)]:
+                    self.drop(old_key)
+                    self.expirations += 1
+            while self.bytes > self.max_bytes and len(self.entries) > 1:
+                old_key, (old_value, old_size, _) = self.entries.popitem(last = False)
+                self.bytes -= old_size
+                self.evictions += 1
+                evicted.append((old_key, old_value))
+        for old_key, old_value in evicted:
+            self.evicted(old_key, old_value)
+
+    def evicted(self, key, value):
+        # Called outside the lock for every entry pushed out by the memory budget
+        pass
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+@st.cache_resource(show_spinner = False)
+def get_result_cache():
+    return ResultCache()
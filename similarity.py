@@ -0,0 +1,112 @@
+import os
+import pickle
+from glob import glob
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from sklearn.neighbors import NearestNeighbors
+
+import clusters
+import data
+
+
+# "Counties like mine": nearest neighbors of a county over selectable groups of combined2 features
+FEATURE_GROUPS = {
+    'Public supply': ['ps_wtotl', 'do_psdel'],
+    'Irrigation': ['ir_wfrto', 'ir_recww', 'ic_wfrto', 'ic_recww', 'ig_wfrto', 'ig_recww'],
+    'Total withdrawal': ['to_wtotl'],
+    'Climate': ['tmean_c', 'moderate_drought'],
+    'Income': ['population', 'median_household_income'],
+}
+# Withdrawals and population span several orders of magnitude, so they are compared on a log scale
+LOG_FEATURES = ['ps_wtotl', 'do_psdel', 'ir_wfrto', 'ir_recww', 'ic_wfrto', 'ic_recww', 'ig_wfrto', 'ig_recww',
+                'to_wtotl', 'population']
+DEFAULT_GROUPS = ('Public supply', 'Total withdrawal', 'Climate', 'Income')
+N_NEIGHBORS = 10
+MAX_NEIGHBORS = 50
+
+
+def feature_groups(df):
+    # Groups whose columns are all present in this combined2
+    return {group: columns for group, columns in FEATURE_GROUPS.items() if set(columns) <= set(df.columns)}
+
+
+def scaled_features(df, groups):
+    # Log-scaled, standardized features with missing values at the median. Each group is divided by the
+    # square root of its width so every selected group weighs the same in the distance, however many columns it has.
+    blocks = {}
+    for group, columns in groups.items():
+        X = df[columns].astype(float)
+        logged = [c for c in columns if c in LOG_FEATURES]
+        X[logged] = np.log1p(X[logged].clip(lower = 0))
+        X = X.fillna(X.median())
+        Z = (X - X.mean()) / X.std(ddof = 0).replace(0, 1)
+        blocks[group] = Z.to_numpy() / np.sqrt(len(columns))
+    return blocks
+
+
+class SimilarityIndex:
+    # One kd-tree per combination of feature groups, built up front so any selection is a single query
+
+    def __init__(self, df):
+        self.fips = df['fips'].to_numpy()
+        self.rows = {code: i for i, code in enumerate(self.fips)}
+        self.blocks = scaled_features(df, feature_groups(df))
+        self.trees = {}
+        groups = list(self.blocks)
+        for n in range(1, len(groups) + 1):
+            for combo in combinations(groups, n):
+                Z = np.hstack([self.blocks[group] for group in combo])
+                self.trees[frozenset(combo)] = NearestNeighbors(algorithm = 'kd_tree').fit(Z)
+
+    @property
+    def groups(self):
+        return tuple(self.blocks)
+
+    def query(self, county_fips, groups, k = N_NEIGHBORS):
+        # The k counties closest to county_fips over the given groups, nearest first, without the county itself
+        combo = [group for group in self.blocks if group in groups]
+        point = np.hstack([self.blocks[group][self.rows[county_fips]] for group in combo])
+        k = min(k + 1, len(self.fips))
+        distances, rows = self.trees[frozenset(combo)].kneighbors(point.reshape(1, -1), n_neighbors = k)
+        result = pd.DataFrame({'fips': self.fips[rows[0]], 'distance': distances[0]})
+        return result[result['fips'] != county_fips].head(k - 1).reset_index(drop = True)
+
+
+def index_path(fingerprint):
+    return os.path.join(clusters.MODEL_DIR, f"similarity_{fingerprint}.pkl")
+
+
+def build_index():
+    df = data.load_combined2()
+    index = SimilarityIndex(df)
+    clusters.save_pickle(index, index_path(clusters.data_fingerprint(df)))
+    return index
+
+
+@st.cache_resource(max_entries = 1, show_spinner = False)
+def _load_index(path, version):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def load_index():
+    # Written only by `python build_data.py neighbors`; never built during a rerun. The file is named by the
+    # combined2 fingerprint, so an index built from other county data raises data.StaleBuildError.
+    hint = "run `python build_data.py neighbors`"
+    path = index_path(clusters.combined2_fingerprint(*data.source_version('combined2')))
+    if not os.path.exists(path):
+        if glob(index_path('*')):
+            raise data.StaleBuildError(f"the similarity index was built from other county data, {hint}")
+        raise FileNotFoundError(f"no similarity index in {clusters.MODEL_DIR}, {hint}")
+    return _load_index(path, data.file_version(path))
+
+
+def similar_counties(county_fips, groups = DEFAULT_GROUPS, k = N_NEIGHBORS):
+    # Nearest counties with their combined2 records, for display
+    county_index = data.load_county_index()
+    result = load_index().query(county_fips, groups, k)
+    records = pd.DataFrame([county_index.record(code) for code in result['fips']])
+    return pd.concat([result[['distance']], records], axis = 1)
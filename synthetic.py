@@ -0,0 +1,329 @@
+import argparse
+import json
+import os
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+from scipy.stats import norm
+
+import data
+import geo
+
+
+# Synthetic source files with the same layout and columns as the real ones, for load testing at many times
+# today's volume without the real data:
+#   python synthetic.py --scale 10 --out ../../data-x10
+#   WATER_USAGE_DATA_DIR=../../data-x10 python build_data.py parquet   (and the other build steps)
+#   WATER_USAGE_DATA_DIR=../../data-x10 streamlit run app.py
+#
+# Units are placed on a lattice around their state's centroid, so neighbors share edges in the generated geometry,
+# and their climate follows from where they land: colder and more seasonal to the north, drier and more irrigated to
+# the west. Up to SCALE_COUNTY_LIMIT units per state get county FIPS codes; more than that get census tract GEOIDs
+# (state, county and six-digit tract) spread over the state's counties.
+
+# State FIPS code, abbreviation, centroid (lat, lon) and number of counties
+STATES = [
+    (1, 'AL', 32.8, -86.8, 67), (2, 'AK', 61.4, -152.3, 30), (4, 'AZ', 34.3, -111.7, 15), (5, 'AR', 34.9, -92.4, 75),
+    (6, 'CA', 37.2, -119.5, 58), (8, 'CO', 39.0, -105.5, 64), (9, 'CT', 41.6, -72.7, 8), (10, 'DE', 39.0, -75.5, 3),
+    (11, 'DC', 38.9, -77.0, 1), (12, 'FL', 28.6, -82.4, 67), (13, 'GA', 32.7, -83.4, 159), (15, 'HI', 20.8, -156.3, 5),
+    (16, 'ID', 44.4, -114.6, 44), (17, 'IL', 40.0, -89.2, 102), (18, 'IN', 39.9, -86.3, 92), (19, 'IA', 42.1, -93.5, 99),
+    (20, 'KS', 38.5, -98.4, 105), (21, 'KY', 37.5, -85.3, 120), (22, 'LA', 31.1, -92.0, 64), (23, 'ME', 45.4, -69.2, 16),
+    (24, 'MD', 39.0, -76.8, 24), (25, 'MA', 42.3, -71.8, 14), (26, 'MI', 44.3, -85.4, 83), (27, 'MN', 46.3, -94.3, 87),
+    (28, 'MS', 32.7, -89.7, 82), (29, 'MO', 38.4, -92.5, 115), (30, 'MT', 47.0, -109.6, 56), (31, 'NE', 41.5, -99.8, 93),
+    (32, 'NV', 39.3, -116.6, 17), (33, 'NH', 43.7, -71.6, 10), (34, 'NJ', 40.2, -74.7, 21), (35, 'NM', 34.4, -106.1, 33),
+    (36, 'NY', 42.9, -75.5, 62), (37, 'NC', 35.6, -79.4, 100), (38, 'ND', 47.5, -100.5, 53), (39, 'OH', 40.3, -82.8, 88),
+    (40, 'OK', 35.6, -97.5, 77), (41, 'OR', 43.9, -120.6, 36), (42, 'PA', 40.9, -77.8, 67), (44, 'RI', 41.7, -71.5, 5),
+    (45, 'SC', 33.9, -80.9, 46), (46, 'SD', 44.4, -100.2, 66), (47, 'TN', 35.9, -86.4, 95), (48, 'TX', 31.5, -99.3, 254),
+    (49, 'UT', 39.3, -111.7, 29), (50, 'VT', 44.1, -72.7, 14), (51, 'VA', 37.5, -78.9, 133), (53, 'WA', 47.4, -120.5, 39),
+    (54, 'WV', 38.6, -80.6, 55), (55, 'WI', 44.6, -89.9, 72), (56, 'WY', 43.0, -107.5, 23),
+]
+COUNTY_NAMES = [
+    'Washington', 'Jefferson', 'Franklin', 'Jackson', 'Lincoln', 'Madison', 'Clay', 'Montgomery', 'Marion', 'Monroe',
+    'Union', 'Wayne', 'Greene', 'Warren', 'Grant', 'Carroll', 'Polk', 'Adams', 'Johnson', 'Lee', 'Clark', 'Marshall',
+    'Lawrence', 'Douglas', 'Hamilton', 'Calhoun', 'Henry', 'Morgan', 'Scott', 'Fayette', 'Benton', 'Lake', 'Shelby',
+    'Harrison', 'Putnam', 'Perry', 'Crawford', 'Cherokee', 'Logan', 'Mercer', 'Boone', 'Brown', 'Butler', 'Orange',
+    'Hancock', 'Pike', 'Sullivan', 'Randolph', 'Knox', 'Hardin', 'Cass', 'Columbia', 'Allen', 'Dallas', 'Houston',
+    'Howard', 'Lewis', 'Mason', 'Miller', 'Pulaski',
+]
+# Most units per state that still fit in three-digit odd county codes
+SCALE_COUNTY_LIMIT = 499
+# Degrees squared covered by the lattice at scale 1, about the area of the contiguous states
+LATTICE_AREA = 850.0
+
+DEFAULT_START_YEAR = 2000
+DEFAULT_END_YEAR = 2022
+# Units generated and written at a time
+CHUNK_UNITS = 2000
+# Warming of every unit, in degrees C per year
+WARMING = 0.025
+# Latent drought index at which each category starts, most severe first, and the width of the transition
+DROUGHT_THRESHOLDS = {'exceptional_drought': 2.2, 'extreme_drought': 1.7, 'severe_drought': 1.2,
+                      'moderate_drought': 0.7}
+DROUGHT_SPREAD = 0.25
+
+COMBINED_COLUMNS = ['state', 'countyname', 'fips', 'population', 'ps_wtotl', 'do_psdel', 'ir_wfrto', 'ir_recww',
+                    'ic_wfrto', 'ic_recww', 'ig_wfrto', 'ig_recww', 'to_wtotl', 'median_household_income', 'tmean_c',
+                    'moderate_drought']
+DATA_DICT = {
+    'state': 'State abbreviation',
+    'countyname': 'County name',
+    'fips': 'County FIPS code',
+    'population': 'Total population',
+    'ps_wtotl': 'Public supply, total withdrawals (Mgal/d)',
+    'do_psdel': 'Domestic, deliveries from public supply (Mgal/d)',
+    'ir_wfrto': 'Irrigation, total fresh withdrawals (Mgal/d)',
+    'ir_recww': 'Irrigation, reclaimed wastewater (Mgal/d)',
+    'ic_wfrto': 'Irrigation-crop, total fresh withdrawals (Mgal/d)',
+    'ic_recww': 'Irrigation-crop, reclaimed wastewater (Mgal/d)',
+    'ig_wfrto': 'Irrigation-golf, total fresh withdrawals (Mgal/d)',
+    'ig_recww': 'Irrigation-golf, reclaimed wastewater (Mgal/d)',
+    'to_wtotl': 'Total withdrawals (Mgal/d)',
+    'median_household_income': 'Median household income (USD)',
+    'tmean_c': 'Mean temperature (C)',
+    'moderate_drought': 'Percent of population in moderate drought or worse',
+}
+
+
+def out_path(out_dir, path):
+    # Same place under out_dir as the real file has under data.DATA_DIR
+    return os.path.join(out_dir, os.path.relpath(path, data.DATA_DIR))
+
+
+def place_units(counts, side):
+    # Lattice cell (column, row) of every unit, state by state: a breadth-first fill from the cell nearest the
+    # state's centroid that skips cells already taken by earlier states
+    taken = set()
+    cells = []
+    for (_, _, lat, lon, _), n in zip(STATES, counts):
+        start = (round(lon / side), round(lat / side))
+        queue, seen = deque([start]), {start}
+        placed = 0
+        while placed < n:
+            cell = queue.popleft()
+            if cell not in taken:
+                taken.add(cell)
+                cells.append(cell)
+                placed += 1
+            x, y = cell
+            for neighbor in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    queue.append(neighbor)
+    return np.array(cells, dtype = np.int64)
+
+
+def unit_table(scale, rng):
+    # One row per unit: state, code, name, lattice cell and center, in state order
+    counts = [max(1, round(n_counties * scale)) for *_, n_counties in STATES]
+    tracts = max(counts) > SCALE_COUNTY_LIMIT
+    side = np.sqrt(LATTICE_AREA / sum(counts))
+    cells = place_units(counts, side)
+
+    rows = []
+    for (state_fips, abbr, *_, n_counties), n in zip(STATES, counts):
+        for k in range(n):
+            if tracts:
+                # Tracts spread over the state's counties, numbered like census tracts within each county
+                county, tract = k % n_counties, k // n_counties
+                code = f"{state_fips:02d}{2 * county + 1:03d}{(tract + 1) * 100:06d}"
+                name = f"{county_name(county)} Tract {tract + 1}"
+            else:
+                # County FIPS codes are odd; the real files store them as plain integers
+                code = state_fips * 1000 + 2 * k + 1
+                name = county_name(k)
+            rows.append((abbr, code, name))
+    units = pd.DataFrame(rows, columns = ['state', 'code', 'name'])
+    units['col'], units['row'] = cells[:, 0], cells[:, 1]
+    units['lon'] = (units['col'] + rng.uniform(-0.3, 0.3, len(units))) * side
+    units['lat'] = (units['row'] + rng.uniform(-0.3, 0.3, len(units))) * side
+    units.attrs['side'] = side
+    units.attrs['tracts'] = tracts
+    return units
+
+
+def county_name(i):
+    name = COUNTY_NAMES[i % len(COUNTY_NAMES)]
+    return name if i < len(COUNTY_NAMES) else f"{name} {i // len(COUNTY_NAMES) + 1}"
+
+
+def aridity(lon):
+    # 0 in the humid east, rising to 1 across the plains into the arid west
+    return np.clip((-98.0 - lon) / 15.0, 0.0, 1.0)
+
+
+def water_use(units, scale, rng):
+    # Population and withdrawals (Mgal/d) shaped like the USGS county estimates: heavy-tailed, public supply
+    # proportional to population, irrigation concentrated in the arid west and mostly spent on crops
+    n = len(units)
+    arid = aridity(units['lon'].to_numpy())
+    population = np.maximum(rng.lognormal(np.log(26000 / scale), 1.3, n), 50).round()
+    ps_wtotl = population * 1.35e-4 * rng.lognormal(0, 0.35, n)
+    do_psdel = ps_wtotl * rng.beta(6, 4, n)
+    ir_wfrto = rng.lognormal(np.log(2.0 / scale) + 2.2 * arid, 1.6)
+    ic_wfrto = ir_wfrto * rng.beta(9, 1.5, n)
+    ir_recww = np.where(rng.random(n) < 0.15, ir_wfrto * rng.beta(1, 20, n), 0.0)
+    ic_recww = ir_recww * rng.beta(5, 2, n)
+    # Thermoelectric, industrial, mining and livestock withdrawals are only part of the total
+    other = rng.lognormal(np.log(4.0 / scale), 2.0, n)
+    income = rng.lognormal(np.log(55000) + 0.04 * (np.log(population) - np.log(26000 / scale)), 0.25)
+    return pd.DataFrame({
+        'population': population.astype(np.int64),
+        'ps_wtotl': ps_wtotl,
+        'do_psdel': do_psdel,
+        'ir_wfrto': ir_wfrto,
+        'ir_recww': ir_recww,
+        'ic_wfrto': ic_wfrto,
+        'ic_recww': ic_recww,
+        'ig_wfrto': ir_wfrto - ic_wfrto,
+        'ig_recww': ir_recww - ic_recww,
+        'to_wtotl': ps_wtotl + ir_wfrto + other,
+        'median_household_income': income.round(),
+    }).round(2)
+
+
+def ar1(phi, shape, rng):
+    # Stationary AR(1) noise with unit variance along the last axis
+    innovations = rng.normal(0, np.sqrt(1 - phi ** 2), shape)
+    innovations[..., 0] = rng.normal(0, 1, shape[:-1])
+    return lfilter([1.0], [1.0, -phi], innovations, axis = -1)
+
+
+def regional_series(n_months, rng):
+    # Temperature and drought anomalies shared by every unit of a state, one row per state
+    return {'temp': ar1(0.5, (len(STATES), n_months), rng), 'drought': ar1(0.93, (len(STATES), n_months), rng)}
+
+
+def climate(units, regional, n_months, rng):
+    # Monthly temperature (C) and drought shares (percent of population) for a chunk of units
+    n = len(units)
+    lat = units['lat'].to_numpy()[:, None]
+    arid = aridity(units['lon'].to_numpy())[:, None]
+    state = units['state_row'].to_numpy()
+    months = np.arange(n_months)
+
+    normal = 25.0 - 0.75 * (lat - 25.0) + rng.normal(0, 1.0, (n, 1))
+    amplitude = 3.0 + 0.35 * np.maximum(lat - 20.0, 0) + 2.0 * arid
+    # Coldest in January, warmest in July
+    seasonal = -amplitude * np.cos(2 * np.pi * (months % 12) / 12)
+    anomaly = 1.2 * regional['temp'][state] + 0.5 * ar1(0.3, (n, n_months), rng)
+    mean_temp = normal + seasonal + WARMING * months / 12 + anomaly
+    diurnal = 10.0 + 5.0 * arid + rng.normal(0, 1.0, (n, 1))
+
+    index = 0.85 * regional['drought'][state] + 0.55 * ar1(0.85, (n, n_months), rng) + 0.5 * arid - 0.2
+    series = {
+        'Tmin_C': mean_temp - diurnal / 2,
+        'Tmax_C': mean_temp + diurnal / 2,
+        'Tmean_C': mean_temp,
+        'Flag_T': np.ones((n, n_months)),
+    }
+    for column, threshold in DROUGHT_THRESHOLDS.items():
+        share = 100 * norm.cdf((index - threshold) / DROUGHT_SPREAD)
+        # The drought monitor reports no drought at all far more often than a trace of it
+        series[column] = np.where(share < 0.5, 0.0, share)
+    return series
+
+
+def write_chunk(df, path, first):
+    # Appends to the csv; the real files carry a running row number as an unnamed first column
+    df.to_csv(path, mode = 'w' if first else 'a', header = first, float_format = '%.4g')
+
+
+def write_geometry(units, path):
+    # One square per unit on the lattice, with corners computed from the integer cell so neighbors share them exactly
+    side = units.attrs['side']
+    features = []
+    for code, name, col, row in zip(units['fips'], units['name'], units['col'], units['row']):
+        x0, x1 = round((col - 0.5) * side, 6), round((col + 0.5) * side, 6)
+        y0, y1 = round((row - 0.5) * side, 6), round((row + 0.5) * side, 6)
+        features.append({
+            'type': 'Feature',
+            'id': code,
+            'properties': {'NAME': name},
+            'geometry': {'type': 'Polygon', 'coordinates': [[[x0, y0], [x1, y0], [x1, y1], [x0, y1], [x0, y0]]]},
+        })
+    with data.atomic_write(path, 'w') as f:
+        json.dump({'type': 'FeatureCollection', 'features': features}, f, separators = (',', ':'))
+
+
+def generate(scale, out_dir, start_year = DEFAULT_START_YEAR, end_year = DEFAULT_END_YEAR, seed = 0,
+             geometry = True, chunk_units = CHUNK_UNITS):
+    rng = np.random.default_rng(seed)
+    units = unit_table(scale, rng)
+    units['fips'] = [code if isinstance(code, str) else f"{code:05d}" for code in units['code']]
+    units['state_row'] = units['state'].map({abbr: i for i, (_, abbr, *_) in enumerate(STATES)})
+    n_months = 12 * (end_year - start_year + 1)
+    month_labels = pd.period_range(f'{start_year}-01', f'{end_year}-12', freq = 'M').strftime('%Y-%m').to_numpy()
+    years = np.arange(start_year, end_year + 1)
+    regional = regional_series(n_months, rng)
+
+    paths = {name: out_path(out_dir, path) for name, path in [
+        ('combined', data.COMBINED_PATH), ('combined2', data.COMBINED2_PATH), ('data_dict', data.DATA_DICT_PATH),
+        ('monthly', data.MONTHLY_PATH), ('yearly', data.YEARLY_PATH), ('counties', data.COUNTIES_PATH),
+        ('geometry', geo.SOURCE_PATH)]}
+    for path in paths.values():
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+
+    # The series are generated and written a chunk of units at a time, so memory stays flat at any scale
+    tmean_c = np.empty(len(units))
+    moderate_drought = np.empty(len(units))
+    for start in range(0, len(units), chunk_units):
+        chunk = units.iloc[start:start + chunk_units]
+        chunk_rng = np.random.default_rng([seed, start])
+        series = climate(chunk, regional, n_months, chunk_rng)
+        tmean_c[start:start + len(chunk)] = series['Tmean_C'].mean(axis = 1)
+        moderate_drought[start:start + len(chunk)] = series['moderate_drought'].mean(axis = 1)
+
+        rows = len(chunk) * n_months
+        monthly = pd.DataFrame({'Month': np.tile(month_labels, len(chunk)),
+                                'FIPS': np.repeat(chunk['code'].to_numpy(), n_months)},
+                               index = np.arange(start * n_months, start * n_months + rows))
+        for column, values in series.items():
+            monthly[column] = values.ravel()
+        write_chunk(monthly, paths['monthly'], start == 0)
+
+        yearly = pd.DataFrame({'year': np.tile(years, len(chunk)),
+                               'FIPS': np.repeat(chunk['code'].to_numpy(), len(years))},
+                              index = np.arange(start * len(years), (start + len(chunk)) * len(years)))
+        for column in ['Tmean_C'] + list(DROUGHT_THRESHOLDS):
+            yearly[column] = series[column].reshape(len(chunk), len(years), 12).mean(axis = 2).ravel()
+        write_chunk(yearly, paths['yearly'], start == 0)
+        print(f"  {min(start + chunk_units, len(units))} of {len(units)} units")
+
+    combined = pd.concat([units[['state', 'name', 'code']].set_axis(['state', 'countyname', 'fips'], axis = 1),
+                          water_use(units, scale, rng)], axis = 1)
+    combined['tmean_c'] = tmean_c.round(2)
+    combined['moderate_drought'] = moderate_drought.round(2)
+    combined = combined[COMBINED_COLUMNS]
+    combined.to_csv(paths['combined2'], index = False)
+    combined.to_csv(paths['combined'], index = False)
+    pd.DataFrame(list(DATA_DICT.items()), columns = ['column', 'description']).to_csv(paths['data_dict'], index = False)
+    pd.DataFrame({'FIPS': units['code'], 'STATE': units['state'], 'COUNTYNAME': units['name'],
+                  'LON': units['lon'].round(4), 'LAT': units['lat'].round(4)}).to_csv(paths['counties'])
+    if geometry:
+        write_geometry(units, paths['geometry'])
+    return units
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Write synthetic source files for load testing the water usage app.')
+    parser.add_argument('--scale', type = float, default = 10,
+                        help = 'units per real county, e.g. 27 for about as many units as census tracts (default: 10)')
+    parser.add_argument('--out', required = True, help = 'data directory to write, laid out like the real one')
+    parser.add_argument('--start-year', type = int, default = DEFAULT_START_YEAR)
+    parser.add_argument('--end-year', type = int, default = DEFAULT_END_YEAR)
+    parser.add_argument('--seed', type = int, default = 0)
+    parser.add_argument('--no-geometry', action = 'store_true', help = 'skip the lattice geometry')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    units = generate(args.scale, args.out, args.start_year, args.end_year, args.seed, not args.no_geometry)
+    kind = 'census tracts' if units.attrs['tracts'] else 'counties'
+    print(f"wrote {len(units)} {kind} x {args.end_year - args.start_year + 1} years to {args.out} "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
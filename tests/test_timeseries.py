@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+import timeseries
+
+
+def test_lttb_short_series():
+    # Seven points into four, buckets 2.5 wide. First bucket (points 1, 2) against the next bucket's average
+    # (4, 2) from (0, 0): triangle areas 2 and 4, so point 2. Second bucket (3, 4, 5) against point 6 from
+    # (2, 0): areas 20, 0 and 4, so the peak at 3. The end points are always kept.
+    x = np.arange(7)
+    y = np.array([0.0, 1.0, 0.0, 5.0, 0.0, 1.0, 0.0])
+    np.testing.assert_array_equal(timeseries.lttb(x, y, 4), [0, 2, 3, 6])
+
+
+def test_lttb_keeps_short_series_whole():
+    x = np.arange(5)
+    y = np.array([1.0, 3.0, 2.0, 5.0, 4.0])
+    np.testing.assert_array_equal(timeseries.lttb(x, y, 5), np.arange(5))
+    np.testing.assert_array_equal(timeseries.lttb(x, y, 2), np.arange(5))
+
+
+def test_rollup_frame_seasons():
+    # Winter 2000-01 is complete, winter 2001-02 is missing January 2002 and spring 2001 is complete. Seasons
+    # are dated by their first month, so January and February belong to the December before them.
+    months = ['2000-12', '2001-01', '2001-02', '2001-03', '2001-04', '2001-05', '2001-12', '2002-02']
+    df = pd.DataFrame({
+        'fips': '01001',
+        'month': pd.to_datetime(months),
+        'value': [1.0, 2.0, 6.0, 4.0, 5.0, 6.0, 7.0, 9.0],
+    })
+    seasons = timeseries.rollup_frame(df, 'fips', 'month', 'seasonal').set_index('month')
+    assert list(seasons.index) == list(pd.to_datetime(['2000-12', '2001-03', '2001-12']))
+    assert seasons.loc[pd.Timestamp('2000-12'), ['value', 'value_min', 'value_max']].tolist() == [3.0, 1.0, 6.0]
+    assert seasons.loc[pd.Timestamp('2001-03'), ['value', 'value_min', 'value_max']].tolist() == [5.0, 4.0, 6.0]
+    assert seasons.loc[pd.Timestamp('2001-12'), ['value', 'value_min', 'value_max']].isna().all()
@@ -0,0 +1,36 @@
+import numpy as np
+from scipy.stats import norm
+
+import trends
+
+
+# One row per case, four years each:
+#   rising with one tie: pairs 1<2, 1<2, 1<3, 2=2, 2<3, 2<3, so S = 5 and one tied pair (t = 2)
+#   falling with a tie and a missing year: 3>1, 3>1, 1=1, so S = -2 over n = 3
+#   constant: S = 0 and every value tied, so the variance is 0
+Y = np.array([
+    [1.0, 2.0, 2.0, 3.0],
+    [3.0, 1.0, 1.0, np.nan],
+    [2.0, 2.0, 2.0, 2.0],
+])
+YEARS = np.arange(2000, 2004)
+
+
+def test_tie_correction():
+    # Sum of t(t-1)(2t+5) over the groups of tied values: 2*1*9, 2*1*9 and 4*3*13
+    np.testing.assert_allclose(trends.tie_correction(Y), [18.0, 18.0, 156.0])
+
+
+def test_mann_kendall_with_ties():
+    S, Z, p_value = trends.mann_kendall(Y)
+    np.testing.assert_array_equal(S, [5.0, -2.0, 0.0])
+    # var = (n(n-1)(2n+5) - ties) / 18: (156 - 18) / 18 and (66 - 18) / 18; Z moves S one step toward 0
+    expected_z = [4 / np.sqrt(138 / 18), -1 / np.sqrt(48 / 18), 0.0]
+    np.testing.assert_allclose(Z, expected_z)
+    np.testing.assert_allclose(p_value, 2 * norm.sf(np.abs(expected_z)))
+    assert p_value[2] == 1.0
+
+
+def test_ols_slope_skips_missing_years():
+    # Rising row: sum(dx dy) = 3 over sum(dx^2) = 5. Falling row over 2000-2002: -2 over 2.
+    np.testing.assert_allclose(trends.ols_slope(YEARS, Y), [0.6, -1.0, 0.0])
@@ -0,0 +1,278 @@
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import data
+
+
+## Time Series Citation: Bob Adams
+# Monthly and yearly series are stored sorted by (FIPS, date) with one .npy file per column and an offset
+# index, so one county's history is a contiguous, memory-mapped slice. Written by `python build_data.py timeseries`.
+STORE_DIR = os.path.join(data.BUILD_DIR, 'timeseries')
+
+# name -> (data layer source, cached loader, FIPS column, date column)
+STORES = {
+    'monthly': ('monthly', data.load_monthly, 'fips', 'month'),
+    'yearly': ('yearly', data.load_yearly, 'FIPS', 'year'),
+}
+
+
+# Coarser views of the monthly store, each holding the mean (under the original column name) plus _min and
+# _max of every column per county and period. The source data is monthly, so that is the finest resolution.
+# name -> months per period
+RESOLUTIONS = {
+    'monthly': 1,
+    'seasonal': 3,
+    'annual': 12,
+}
+# Part of the rollup store names, bumped when rollup_frame changes so rollups built before are not read
+ROLLUP_FORMAT = 2
+
+# A date range is shown at the finest resolution that draws it with at most this many points (40 years monthly)
+RANGE_POINTS = 480
+
+
+def store_path(name):
+    return os.path.join(STORE_DIR, f'{name}.v{data.FORMAT_VERSION}')
+
+
+class SeriesStore:
+    # Column arrays sorted by (FIPS, date) plus FIPS -> (start, stop) row offsets
+
+    def __init__(self, date_column, columns, fips, starts, stops):
+        self.date_column = date_column
+        self.columns = columns
+        # Set by load_store and load_rollup; identify the data for caches of anything derived from the store
+        self.name = None
+        self.version = None
+        self.offsets = dict(zip(fips, zip(starts, stops)))
+
+    @classmethod
+    def from_frame(cls, df, fips_column, date_column):
+        df = df.sort_values([fips_column, date_column], kind = 'stable')
+        fips = df[fips_column].to_numpy()
+        # Row where each county's run starts, found in one pass over the sorted keys
+        boundaries = np.flatnonzero(fips[1:] != fips[:-1]) + 1
+        starts = np.concatenate([[0], boundaries])
+        stops = np.concatenate([boundaries, [len(fips)]])
+        columns = {date_column: df[date_column].to_numpy(dtype = 'datetime64[ns]')}
+        for column in df.select_dtypes('number').columns:
+            columns[column] = df[column].to_numpy()
+        return cls(date_column, columns, fips[starts].tolist(), starts.tolist(), stops.tolist())
+
+    @classmethod
+    def open(cls, directory):
+        index = np.load(os.path.join(directory, 'index.npz'))
+        date_column = str(index['date_column'])
+        columns = {}
+        for column in index['columns'].tolist():
+            columns[column] = np.load(os.path.join(directory, column + '.npy'), mmap_mode = 'r')
+        return cls(date_column, columns, index['fips'].tolist(), index['starts'].tolist(), index['stops'].tolist())
+
+    def write(self, directory):
+        os.makedirs(directory, exist_ok = True)
+        for column, values in self.columns.items():
+            path = os.path.join(directory, column + '.npy')
+            with data.atomic_write(path) as f:
+                np.save(f, np.asarray(values))
+        fips = list(self.offsets)
+        # The index goes last and marks the store as complete
+        path = os.path.join(directory, 'index.npz')
+        with data.atomic_write(path) as f:
+            np.savez(f, date_column = self.date_column, columns = list(self.columns), fips = np.array(fips),
+                     starts = np.array([self.offsets[code][0] for code in fips]),
+                     stops = np.array([self.offsets[code][1] for code in fips]))
+
+    def __contains__(self, fips):
+        return fips in self.offsets
+
+    def county(self, fips, min_year = None, columns = None, max_year = None):
+        # One county's rows from min_year through max_year, indexed by date. Only the requested slice is
+        # read from disk.
+        start, stop = self.offsets.get(fips, (0, 0))
+        dates = self.columns[self.date_column][start:stop]
+        if max_year is not None:
+            stop = start + int(np.searchsorted(dates, np.datetime64(f'{max_year + 1}-01-01')))
+        if min_year is not None:
+            start += int(np.searchsorted(dates, np.datetime64(f'{min_year}-01-01')))
+        columns = columns or [c for c in self.columns if c != self.date_column]
+        index = pd.DatetimeIndex(np.array(self.columns[self.date_column][start:stop]), name = self.date_column)
+        return pd.DataFrame({c: np.array(self.columns[c][start:stop]) for c in columns}, index = index)
+
+    def gather(self, fips = None):
+        # (fips, rows, lengths): row numbers of the given counties (every county by default) one county after
+        # another, and the number of rows of each, so a column is read with one fancy index
+        fips = list(self.offsets) if fips is None else [code for code in fips if code in self.offsets]
+        spans = np.array([self.offsets[code] for code in fips], dtype = np.int64).reshape(-1, 2)
+        lengths = spans[:, 1] - spans[:, 0]
+        rows = np.arange(lengths.sum()) + np.repeat(spans[:, 0] - (np.cumsum(lengths) - lengths), lengths)
+        return fips, rows, lengths
+
+    def counties(self, fips, min_year = None, columns = None, max_year = None):
+        # Rows of several counties as one long frame with a fips column, gathered with a single fancy
+        # index per column rather than one slice (or one full-frame filter) per county
+        fips, rows, lengths = self.gather(fips)
+        dates = np.asarray(self.columns[self.date_column][rows])
+        keep = np.ones(len(rows), dtype = bool)
+        if min_year is not None:
+            keep &= dates >= np.datetime64(f'{min_year}-01-01')
+        if max_year is not None:
+            keep &= dates < np.datetime64(f'{max_year + 1}-01-01')
+        rows = rows[keep]
+        columns = columns or [c for c in self.columns if c != self.date_column]
+        df = pd.DataFrame({c: np.asarray(self.columns[c][rows]) for c in columns},
+                          index = pd.DatetimeIndex(dates[keep], name = self.date_column))
+        df.insert(0, 'fips', np.repeat(np.array(fips, dtype = object), lengths)[keep])
+        return df
+
+    def year_range(self, fips):
+        start, stop = self.offsets[fips]
+        dates = self.columns[self.date_column]
+        return pd.Timestamp(dates[start]).year, pd.Timestamp(dates[stop - 1]).year
+
+
+def lttb(x, y, n_out):
+    # Largest-Triangle-Three-Buckets: indices of n_out points that keep the visual shape of the series
+    #cite: Steinarsson, Downsampling Time Series for Visual Representation (2013)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype = float)
+    y = np.asarray(y, dtype = float)
+    every = (n - 2) / (n_out - 2)
+    selected = np.empty(n_out, dtype = np.int64)
+    selected[0] = a = 0
+    for i in range(n_out - 2):
+        # Average of the next bucket is the third corner of the triangle
+        next_start = int((i + 1) * every) + 1
+        next_stop = min(int((i + 2) * every) + 1, n)
+        avg_x = x[next_start:next_stop].mean()
+        avg_y = np.nanmean(y[next_start:next_stop]) if np.isfinite(y[next_start:next_stop]).any() else y[a]
+
+        start = int(i * every) + 1
+        stop = int((i + 1) * every) + 1
+        area = np.abs((x[a] - avg_x) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (avg_y - y[a]))
+        a = start + int(np.argmax(np.nan_to_num(area, nan = -1.0)))
+        selected[i + 1] = a
+    selected[-1] = n - 1
+    return selected
+
+
+def downsample(series, n_out):
+    # (dates, values) of a date-indexed series reduced to at most n_out points with lttb
+    dates = series.index.to_numpy()
+    keep = lttb(dates.astype('datetime64[ns]').astype(np.int64), series.to_numpy(), n_out)
+    return dates[keep], series.to_numpy()[keep]
+
+
+def rollup_frame(df, fips_column, date_column, resolution):
+    # Mean, min and max of every numeric column per county and period. Seasons are meteorological
+    # (DJF, MAM, JJA, SON) and are dated by their first month, so December starts the next year's winter.
+    # Periods missing any month of a column (such as the ends of the record) are NaN for that column.
+    months = df[date_column].to_numpy(dtype = 'datetime64[M]').astype(np.int64)
+    if resolution == 'seasonal':
+        periods = months - (months % 12 + 1) % 3
+    else:
+        periods = months - months % RESOLUTIONS[resolution]
+    columns = df.select_dtypes('number').columns
+    grouped = df[columns].groupby([df[fips_column].to_numpy(), periods]).agg(['mean', 'min', 'max', 'count'])
+    for c in columns:
+        short = grouped[c, 'count'].to_numpy() < RESOLUTIONS[resolution]
+        grouped.loc[short, [(c, 'mean'), (c, 'min'), (c, 'max')]] = np.nan
+    grouped = grouped.drop(columns = [(c, 'count') for c in columns])
+    grouped.columns = [c if stat == 'mean' else f'{c}_{stat}' for c, stat in grouped.columns]
+    grouped.index.names = [fips_column, date_column]
+    grouped = grouped.reset_index()
+    grouped[date_column] = grouped[date_column].to_numpy().astype('datetime64[M]').astype('datetime64[ns]')
+    return grouped
+
+
+def rollup_name(resolution):
+    return f'monthly-{resolution}-r{ROLLUP_FORMAT}'
+
+
+def range_resolution(min_year, max_year, points = RANGE_POINTS):
+    # Finest resolution that shows the span with at most `points` points, else the coarsest
+    months = (max_year - min_year + 1) * 12
+    for resolution, period in sorted(RESOLUTIONS.items(), key = lambda item: item[1]):
+        if -(-months // period) <= points:
+            return resolution
+    return max(RESOLUTIONS, key = RESOLUTIONS.get)
+
+
+def build_store(name):
+    source, _, fips_column, date_column = STORES[name]
+    store = SeriesStore.from_frame(data.read_source(source), fips_column, date_column)
+    store.write(store_path(name))
+    return store
+
+
+def build_rollups():
+    _, _, fips_column, date_column = STORES['monthly']
+    df = data.read_source('monthly')
+    stores = {}
+    for resolution in RESOLUTIONS:
+        if resolution == 'monthly':
+            continue
+        store = SeriesStore.from_frame(rollup_frame(df, fips_column, date_column, resolution), fips_column, date_column)
+        store.write(store_path(rollup_name(resolution)))
+        stores[resolution] = store
+    return stores
+
+
+@st.cache_resource(max_entries = len(STORES) + len(RESOLUTIONS), show_spinner = False)
+def _open_store(name, directory, version):
+    store = SeriesStore.open(directory)
+    store.name = name
+    store.version = version
+    return store
+
+
+@st.cache_resource(max_entries = len(STORES), show_spinner = False)
+def _frame_store(name, path, version):
+    _, loader, fips_column, date_column = STORES[name]
+    store = SeriesStore.from_frame(loader(), fips_column, date_column)
+    store.name = name
+    store.version = version
+    return store
+
+
+@st.cache_resource(max_entries = len(RESOLUTIONS), show_spinner = False)
+def _frame_rollup(resolution, path, version):
+    _, loader, fips_column, date_column = STORES['monthly']
+    store = SeriesStore.from_frame(rollup_frame(loader(), fips_column, date_column, resolution), fips_column, date_column)
+    store.name = rollup_name(resolution)
+    store.version = version
+    return store
+
+
+def _built_version(name, source_version):
+    # Version of the memory-mapped store on disk, or None if it is missing or older than its source
+    index_path = os.path.join(store_path(name), 'index.npz')
+    if os.path.exists(index_path) and data.file_version(index_path) >= source_version:
+        return data.file_version(index_path)
+    return None
+
+
+def load_store(name):
+    # The memory-mapped store when it is at least as new as its source, otherwise an in-memory one built
+    # from the data layer's frame
+    source_path, source_version = data.source_version(STORES[name][0])
+    version = _built_version(name, source_version)
+    if version is not None:
+        return _open_store(name, store_path(name), version)
+    return _frame_store(name, source_path, source_version)
+
+
+def load_rollup(resolution):
+    # The monthly store aggregated to `resolution`, read from disk like load_store when it has been built
+    if resolution == 'monthly':
+        return load_store('monthly')
+    name = rollup_name(resolution)
+    source_path, source_version = data.source_version(STORES['monthly'][0])
+    version = _built_version(name, source_version)
+    if version is not None:
+        return _open_store(name, store_path(name), version)
+    return _frame_rollup(resolution, source_path, source_version)
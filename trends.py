@@ -0,0 +1,162 @@
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scipy.stats import norm
+
+import data
+import timeseries
+
+
+# Trend statistics of every county's annual means, one row per (county, metric), ranked within each metric.
+# Written by `python build_data.py trends`.
+TRENDS_PATH = os.path.join(data.BUILD_DIR, f'trends.v{data.FORMAT_VERSION}.parquet')
+
+# Monthly store column -> label on the National Trends page
+METRICS = {
+    'mean_temp': 'Mean Temp (F)',
+    'exceptional_drought': 'Exceptional Drought',
+    'extreme_plus': 'Extreme Drought or worse',
+    'severe_plus': 'Severe Drought or worse',
+    'moderate_plus': 'Moderate Drought or worse',
+}
+# Recent-vs-baseline delta: mean of the last RECENT_YEARS years minus the mean of the first BASELINE_YEARS
+BASELINE_YEARS = 10
+RECENT_YEARS = 5
+# Mann-Kendall significance level
+ALPHA = 0.05
+# Years with fewer months than this are left out of the annual means
+MIN_MONTHS = 12
+
+
+def annual_matrix(store, column, min_months = MIN_MONTHS):
+    # (fips, years, counties x years matrix of annual means), NaN for incomplete years. Built with one
+    # bincount over the store's arrays, so there is no per-county work.
+    fips, rows, lengths = store.gather()
+    county = np.repeat(np.arange(len(fips)), lengths)
+    years = np.asarray(store.columns[store.date_column][rows]).astype('datetime64[Y]').astype(np.int64) + 1970
+    values = np.asarray(store.columns[column][rows], dtype = float)
+
+    first, last = years.min(), years.max()
+    n_years = last - first + 1
+    cells = county * n_years + (years - first)
+    present = ~np.isnan(values)
+    size = len(fips) * n_years
+    sums = np.bincount(cells, weights = np.where(present, values, 0.0), minlength = size)
+    counts = np.bincount(cells, weights = present, minlength = size)
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        Y = np.where(counts >= min_months, sums / counts, np.nan)
+    return fips, np.arange(first, last + 1), Y.reshape(len(fips), n_years)
+
+
+def ols_slope(years, Y):
+    # Least squares slope of every row, ignoring missing years
+    present = ~np.isnan(Y)
+    n = present.sum(axis = 1)
+    x = np.where(present, years, 0.0)
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        x_mean = x.sum(axis = 1) / n
+        y_mean = np.nansum(Y, axis = 1) / n
+        dx = np.where(present, years - x_mean[:, None], 0.0)
+        dy = np.where(present, Y - y_mean[:, None], 0.0)
+        return (dx * dy).sum(axis = 1) / (dx * dx).sum(axis = 1)
+
+
+def tie_correction(Y):
+    # Sum of t(t-1)(2t+5) over each row's groups of tied values, from one groupby over (row, value)
+    rows, columns = np.nonzero(~np.isnan(Y))
+    ties = pd.DataFrame({'row': rows, 'value': Y[rows, columns]}).groupby(['row', 'value']).size()
+    t = ties.to_numpy(dtype = float)
+    per_row = pd.Series(t * (t - 1) * (2 * t + 5), index = ties.index.get_level_values('row')).groupby(level = 0).sum()
+    return per_row.reindex(range(len(Y)), fill_value = 0.0).to_numpy()
+
+
+def mann_kendall(Y):
+    # Mann-Kendall S, Z and two-sided p-value of every row at once, with the tie-corrected variance.
+    #cite: Hipel & McLeod, Time Series Modelling of Water Resources and Environmental Systems (1994)
+    S = np.zeros(len(Y))
+    for lag in range(1, Y.shape[1]):
+        S += np.nan_to_num(np.sign(Y[:, lag:] - Y[:, :-lag])).sum(axis = 1)
+    n = (~np.isnan(Y)).sum(axis = 1).astype(float)
+    var = (n * (n - 1) * (2 * n + 5) - tie_correction(Y)) / 18
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        Z = np.where(var > 0, (S - np.sign(S)) / np.sqrt(var), 0.0)
+    return S, Z, 2 * norm.sf(np.abs(Z))
+
+
+def compute_trends(store):
+    frames = []
+    for column in METRICS:
+        fips, years, Y = annual_matrix(store, column)
+        S, Z, p_value = mann_kendall(Y)
+        with np.errstate(invalid = 'ignore'):
+            baseline = np.nanmean(Y[:, :BASELINE_YEARS], axis = 1)
+            recent = np.nanmean(Y[:, -RECENT_YEARS:], axis = 1)
+        frame = pd.DataFrame({
+            'fips': fips,
+            'metric': column,
+            'slope_per_decade': ols_slope(years, Y) * 10,
+            'mk_s': S,
+            'mk_z': Z,
+            'p_value': p_value,
+            'significant': p_value < ALPHA,
+            'baseline': baseline,
+            'recent': recent,
+            'delta': recent - baseline,
+            'n_years': (~np.isnan(Y)).sum(axis = 1),
+            'first_year': years[0],
+            'last_year': years[-1],
+        })
+        frame['rank'] = frame['slope_per_decade'].rank(ascending = False, method = 'min').astype('Int32')
+        frames.append(frame.sort_values('rank'))
+    return pd.concat(frames, ignore_index = True)
+
+
+def build_trends():
+    trends = compute_trends(timeseries.load_store('monthly'))
+    os.makedirs(data.BUILD_DIR, exist_ok = True)
+    data.write_parquet(trends, TRENDS_PATH)
+    return trends
+
+
+@st.cache_resource(max_entries = 1, show_spinner = False)
+def _load_trends(path, version, monthly_version):
+    trends = pd.read_parquet(path)
+    # Built from every county and year in the monthly store, so a county or year added since shows here
+    store = timeseries.load_store('monthly')
+    starts, stops = (np.array(bounds) for bounds in zip(*store.offsets.values()))
+    dates = store.columns[store.date_column]
+    first, last = (np.asarray(dates[rows]).astype('datetime64[Y]').astype(np.int64) + 1970 for rows in (starts, stops - 1))
+    matches = (set(trends['fips']) == set(store.offsets) and trends['first_year'].min() == first.min()
+               and trends['last_year'].max() == last.max())
+    return trends, matches
+
+
+def load_trends():
+    # Written only by `python build_data.py trends`; never computed during a rerun. A table built from other
+    # monthly data raises data.StaleBuildError.
+    hint = "run `python build_data.py trends`"
+    if not os.path.exists(TRENDS_PATH):
+        raise FileNotFoundError(f"no trends in {data.BUILD_DIR}, {hint}")
+    trends, matches = _load_trends(TRENDS_PATH, data.file_version(TRENDS_PATH), timeseries.load_store('monthly').version)
+    if not matches:
+        raise data.StaleBuildError(f"the trends were built from other monthly data, {hint}")
+    return trends
+
+
+def ranking(metric, state = None, significant_only = False, sort_by = 'slope_per_decade', ascending = False):
+    # Counties ranked by the given statistic for one metric, with their names. The rank is by that statistic
+    # among the counties that pass the filters, not the stored slope rank.
+    county_index = data.load_county_index()
+    trends = load_trends()
+    table = trends[trends['metric'] == metric]
+    if significant_only:
+        table = table[table['significant']]
+    table = table[table['fips'].isin(county_index.records)]
+    table = table.assign(county = table['fips'].map(lambda code: county_index.record(code)['countyname']),
+                         state = table['fips'].map(lambda code: county_index.record(code)['state']))
+    if state is not None:
+        table = table[table['state'] == state]
+    table = table.assign(rank = table[sort_by].rank(ascending = ascending, method = 'min').astype('Int32'))
+    return table.sort_values(sort_by, ascending = ascending)